@@ -0,0 +1,94 @@
+import time
+import numpy as np
+from scipy import signal
+
+from modem.interfaces import Demodulator
+from modem.utils import Audio, DemodulatedData, data_sectors
+from modem.filters import band_pass
+from modem.detection import find_main_frequency, find_transmission, moving_average
+from modem.framing import bits_to_data, packet_size
+from modem.waveforms import gray_symbols_to_bits
+
+
+class ASK4(Demodulator):
+    BITS_PER_SYMBOL = 2
+
+    def __init__(self, logger, config, comm_config):
+        logger.debug("4-ASK demodulation init")
+        self.logger = logger
+        self.config = config
+        self.comm_config = comm_config
+
+    def demodulate(self, audio: Audio):
+        def wrapper():
+            start_time = time.time()
+            data = self.__demodulate(audio)
+            end_time = time.time()
+            self.logger.info(f"message demodulated in {round(end_time - start_time, 2)}s")
+            return data
+
+        return wrapper()
+
+    def __demodulate(self, audio: Audio):
+        self.logger.debug("4-ASK demodulation started")
+        self.logger.debug(f"4-ASK demodulation loaded config: '{self.config}'")
+
+        samples = np.array(audio.getSamples(), dtype=np.float64)
+        sample_rate = audio.getSampleRate()
+        symbol_rate = self.comm_config["baud_rate[bps]"]
+        samples_per_symbol = sample_rate / symbol_rate
+        symbols_per_packet = packet_size(self.comm_config) * 8 // self.BITS_PER_SYMBOL
+
+        with self.profiler.stage("carrier estimate"):
+            main_freq = find_main_frequency(samples, sample_rate, expected=self.config["carrier_frequency[Hz]"])
+        self.logger.debug(f"found main frequency at: {int(main_freq)}Hz")
+
+        if self.config["apply_frequency_cut"]:
+            with self.profiler.stage("filtering"):
+                samples = band_pass(samples, main_freq, sample_rate, offset=100)
+                samples /= np.max(np.abs(samples), axis=0)
+        with self.profiler.stage("envelope"):
+            envelope = np.abs(signal.hilbert(samples))
+            if self.config["apply_filters"]:
+                envelope = signal.medfilt(envelope, 5)
+
+        with self.profiler.stage("detection"):
+            start, stop = find_transmission(samples, self.config["detection_threshold"],
+                                            max(1, int(samples_per_symbol)))
+        # lowest level symbols at the end of transmission can be lost in noise,
+        # every packet ends with the same stop byte so symbol count is rounded up to whole packets
+        symbols_amount = int(np.ceil(round((stop - start) / samples_per_symbol) / symbols_per_packet))
+        symbols_amount *= symbols_per_packet
+        self.logger.debug(f"transmission found at samples {start}-{stop} ({symbols_amount} symbols)")
+
+        # average of the middle half of every symbol, edges are smeared by filters
+        with self.profiler.stage("thresholding"):
+            centers = start + ((np.arange(symbols_amount) + 0.5) * samples_per_symbol).astype(int)
+            averaged = moving_average(envelope, max(1, int(samples_per_symbol / 2)))
+            values = averaged[np.minimum(centers, len(averaged) - 1)] if len(averaged) else np.zeros(symbols_amount)
+
+            # every packet ends with the highest level symbol (stop byte), it is used as amplitude reference
+            levels = np.array(self.config["symbol_amplitudes"]) / np.max(self.config["symbol_amplitudes"])
+            reference = np.percentile(values, 99) if symbols_amount else 1.0
+            symbols = np.digitize(values / (reference or 1.0), (levels[1:] + levels[:-1]) / 2)
+            bits = gray_symbols_to_bits(symbols, self.BITS_PER_SYMBOL)
+
+        with self.profiler.stage("sectoring"):
+            bands = np.minimum(start + np.ceil(np.arange(symbols_amount + 1) * samples_per_symbol).astype(int),
+                               len(samples))
+            digital_samples = np.zeros(len(samples))
+            if symbols_amount:
+                digital_samples[bands[0]:bands[-1]] = np.repeat(levels[symbols], np.diff(bands))
+            bits_analysis = data_sectors(bands[:-1], bands[1:], symbols)
+
+        data, crc_check = bits_to_data(bits, self.comm_config, self.logger, self.profiler)
+
+        if not crc_check:
+            self.logger.critical("crc failed!")
+
+        return DemodulatedData(demodulator=self,
+                               digital_samples=digital_samples,
+                               demodulated_data=data,
+                               bits_analysis=bits_analysis,
+                               audio=audio,
+                               crc_check_pass=crc_check)
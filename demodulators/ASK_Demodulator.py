@@ -1,15 +1,25 @@
 import copy
 import time
 import math
+import itertools
 import numpy as np
 from scipy import signal
-from crc import Calculator, Crc8
 
 from modem.interfaces import Demodulator
-from modem.utils import Audio, DemodulatedData, DataSector
+from modem.filters import band_pass, band_pass_causal, band_pass_gain, envelope_causal
+from modem.ddc import decimation_factor, downconvert, channelize
+from modem.detection import find_main_frequency, CarrierEstimator
+from modem.framing import bits_to_data, find_frames, frames_to_packets, deinterleave_packets, decode_packets, \
+    check_packets_crc, packet_size, SYNC_SLIP
+from modem.interleaving import interleaving_depth, block_votes
+from modem.timing import SymbolTiming
+from modem.utils import Audio, AudioStream, DemodulatedData, DemodulatedPacket, data_sectors
 
 
 class ASK(Demodulator):
+    HILBERT_TAPS = 129
+    CARRIER_HOLD_SAMPLES = 2 ** 18
+
     def __init__(self, logger, config, comm_config):
         logger.debug("ASK demodulation init")
         self.logger = logger
@@ -26,36 +36,272 @@ class ASK(Demodulator):
 
         return wrapper()
 
+    def demodulate_stream(self, audio_stream: AudioStream):
+        """
+        this method demodulates audio block by block and yields packets as soon as they are received,
+        memory usage depends on block size instead of recording length
+        (envelope comes from causal FIR hilbert transformer instead of hilbert transform of whole recording,
+        signal is not decimated)
+        :param audio_stream: AudioStream with blocks of samples
+        :return: generator of DemodulatedPacket
+        """
+        self.logger.debug("ASK stream demodulation started")
+        self.logger.debug(f"ASK demodulation loaded config: '{self.config}'")
+
+        sample_rate = audio_stream.sample_rate
+        use_crc = self.comm_config["crc8_sum"]
+        packet_len = self.comm_config["packet_len[bytes]"]
+        bytes_per_packet = packet_size(self.comm_config)
+        bits_per_packet = bytes_per_packet * 8
+
+        timing = SymbolTiming(sample_rate / self.comm_config["baud_rate[bps]"])
+        envelopes = self.__stream_envelope(audio_stream.blocks, sample_rate)
+        bits = np.zeros(0, dtype=np.uint8)
+        silence = np.zeros(0, dtype=np.uint8)  # zero bits after the last one bit, they may be silence
+        expected = None  # bit index of next packet once frames are synchronized
+        packet_n = 0  # index of next packet
+        # packets are decoded when whole interleaving block was received
+        depth = interleaving_depth(self.comm_config)
+        votes = np.zeros(depth, dtype=np.int64)  # offset of interleaving blocks voted by block bytes of packets
+        pending = np.zeros((0, bytes_per_packet), dtype=np.uint8)
+        pending_indexes = np.zeros(0, dtype=np.int64)
+        for envelope in itertools.chain(envelopes, [None]):
+            final = envelope is None
+            with self.profiler.stage("thresholding"):
+                if final:
+                    _, integrals = timing.update(np.zeros(0), final=True)
+                else:
+                    _, integrals = timing.update(envelope - self.config["one_symbol_amplitude"])
+                decided = np.concatenate((silence, (integrals > 0).astype(np.uint8)))
+                ones = np.flatnonzero(decided)
+                end = ones[-1] + 1 if len(ones) else 0
+                bits, silence = np.concatenate((bits, decided[:end])), decided[end:]
+
+            with self.profiler.stage("framing"):
+                starts, lost = find_frames(bits, bytes_per_packet, self.comm_config["start_byte"],
+                                           self.comm_config["stop_byte"], expected=expected, final=final)
+                packets = frames_to_packets(bits, starts, bytes_per_packet)
+            if lost:
+                self.logger.error(f"frame synchronization lost {lost} packets!")
+            # packets lost between found packets are counted from distance of their starts, the rest is before them
+            indexes = np.rint((starts - starts[0]) / bits_per_packet).astype(np.int64) if len(starts) else starts
+            indexes += packet_n + lost - (int(indexes[-1]) + 1 - len(starts) if len(starts) else 0)
+            pending = np.vstack((pending, packets))
+            pending_indexes = np.concatenate((pending_indexes, indexes))
+            packet_n += lost + len(packets)
+            if depth > 1:
+                votes += block_votes(packets[:, 1], indexes, depth)
+            offset = int(np.argmax(votes))
+
+            # blocks are complete once position of the next packet is in another block
+            complete = (packet_n + offset) // depth * depth
+            ready = np.ones(len(pending), dtype=bool) if final or depth <= 1 else pending_indexes + offset < complete
+            packets, indexes = pending[ready], pending_indexes[ready]
+            pending, pending_indexes = pending[~ready], pending_indexes[~ready]
+            with self.profiler.stage("interleaving"):
+                packets = deinterleave_packets(packets, indexes, self.comm_config, offset=offset,
+                                               end=None if final else complete)
+
+            first_packet = int(indexes[0]) if len(indexes) else 0
+            with self.profiler.stage("fec"):
+                packets = decode_packets(packets, self.comm_config, self.logger, first_packet=first_packet)
+            with self.profiler.stage("crc"):
+                crc_checks = check_packets_crc(packets, packet_len, self.logger, first_packet=first_packet) \
+                    if use_crc else np.ones(len(packets), dtype=bool)
+            for index, packet, crc_check in zip(indexes.tolist(), packets, crc_checks.tolist()):
+                yield DemodulatedPacket(index, bytearray(packet[1:packet_len + 1].tobytes()), crc_check)
+
+            if len(starts):
+                # few bits before next packet are kept, so it can be found even when a bit slipped
+                first = max(0, int(starts[-1]) + bits_per_packet - SYNC_SLIP)
+                expected = int(starts[-1]) + bits_per_packet - first
+                bits = bits[first:]
+            elif len(bits) > 3 * bits_per_packet:
+                # synchronization is acquired again from the latest bits, whole packets are skipped,
+                # so packets found later keep their index (skipped packets are counted as lost)
+                reference = expected or 0
+                skipped = (len(bits) - 2 * bits_per_packet - reference) // bits_per_packet
+                packet_n += skipped
+                bits = bits[max(0, reference + skipped * bits_per_packet - SYNC_SLIP):]
+                expected = None
+
+        if not packet_n:
+            self.logger.error("frame synchronization found no packet!")
+        self.logger.info(f"stream demodulation complete! ({packet_n} packets)")
+
+    def __stream_envelope(self, blocks, sample_rate):
+        """
+        this method yields envelope of consecutive audio blocks, envelope blocks are aligned with audio samples
+        """
+        delay = self.HILBERT_TAPS // 2
+        zi = history = None
+        median_history = np.zeros(2)
+        samples_amount = 0
+        emitted = -delay  # first outputs of hilbert transformer belong to samples before the stream
+
+        def pieces():
+            nonlocal samples_amount
+            frequency = None
+            carrier_blocks = self.__carrier_blocks(blocks, sample_rate) if self.config["apply_frequency_cut"] else \
+                ((None, block) for block in blocks)
+            for frequency, block in carrier_blocks:
+                samples_amount += len(block)
+                yield frequency, np.asarray(block, dtype=np.float64)
+            # flushes samples delayed by hilbert transformer and median filter
+            yield frequency, np.zeros(delay + 2)
+
+        for frequency, block in pieces():
+            if frequency is not None:
+                with self.profiler.stage("filtering"):
+                    block, zi = band_pass_causal(block, frequency, sample_rate, offset=100, zi=zi)
+                    block /= band_pass_gain(int(round(frequency)), 100, sample_rate)
+
+            with self.profiler.stage("envelope"):
+                envelope, history = envelope_causal(block, self.HILBERT_TAPS, history)
+
+                if self.config["apply_filters"]:
+                    # median filter lags 2 samples, unfiltered samples are kept with 2 samples of context
+                    extended = np.concatenate((median_history, envelope))
+                    envelope = signal.medfilt(extended, 5)[2:-2] if len(extended) >= 5 else extended[:0]
+                    median_history = extended[-4:]
+
+            skipped = max(0, min(-emitted, len(envelope)))
+            envelope = envelope[skipped:max(skipped, samples_amount - emitted)]
+            emitted += skipped + len(envelope)
+            yield envelope
+
+    def __carrier_blocks(self, blocks, sample_rate):
+        """
+        this method holds first blocks of a stream until its carrier frequency is estimated
+        (at most <CARRIER_HOLD_SAMPLES> samples are held)
+        :return: generator of carrier frequency and block
+        """
+        estimator = CarrierEstimator(sample_rate, self.config["carrier_frequency[Hz]"],
+                                     max_samples=self.CARRIER_HOLD_SAMPLES)
+        held = []
+        for block in blocks:
+            if estimator.complete:
+                yield estimator.frequency, block
+                continue
+            with self.profiler.stage("carrier estimate"):
+                estimator.update(block)
+            held.append(block)
+            if estimator.complete:
+                self.logger.debug(f"found main frequency at: {int(estimator.frequency)}Hz")
+                yield estimator.frequency, np.concatenate(held)
+                held = []
+        if held:
+            yield estimator.frequency, np.concatenate(held)
+
+    def demodulate_bits(self, audio: Audio):
+        """
+        this method decides bits of any part of a transmission (symbol timing locks on edges of data bits,
+        start of the transmission is not needed), so long transmission can be demodulated in parts
+        :param audio: part of recording
+        :return: digital samples and bits analysis with one sector per bit
+        """
+        self.logger.debug("ASK bit decision started")
+        samples, decimation = self.__envelope(audio)
+        return self.__decide_bits(samples, decimation, audio)
+
     def __demodulate(self, audio: Audio):
         self.logger.debug("ASK demodulation started")
         self.logger.debug(f"ASK demodulation loaded config: '{self.config}'")
-
+        samples, decimation = self.__envelope(audio)
+        return self.__decode_envelope(samples, decimation, audio)
+
+    def __envelope(self, audio: Audio):
+        """
+        this method finds carrier of the recording and computes its envelope
+        (from decimated baseband when decimation is possible)
+        :return: envelope and its decimation factor against the recording
+        """
         audio_samples = audio.getSamples()
         samples = copy.copy(audio_samples)
         sample_rate = audio.getSampleRate()
         audio_length = audio.getAudioLength()
-        samples_amount = audio.getSamplesAmount()
         baud_rate = self.comm_config["baud_rate[bps]"]
-        samples_per_bit = int(samples_amount / (baud_rate * audio_length))
-        use_crc = self.comm_config["crc8_sum"]
-        bytes_per_packet = (self.comm_config["packet_len[bytes]"] + 3 if use_crc else 2)
-        packet_len = self.comm_config["packet_len[bytes]"]
+        # nominal bit length, actual bit clock is recovered from the signal
+        samples_per_bit = sample_rate / baud_rate
 
-        main_freq = self.__find_main_frequency(samples, sample_rate, samples_amount)
+        with self.profiler.stage("carrier estimate"):
+            main_freq = find_main_frequency(samples, sample_rate, expected=self.config["carrier_frequency[Hz]"])
 
         self.logger.debug(f"audio length: {round(audio_length, 2)}s")
         self.logger.debug(f"found main frequency at: {int(main_freq)}Hz")
 
-        if self.config["apply_frequency_cut"]:
-            samples = self.__apply_filters(samples, main_freq, sample_rate)
-        samples = np.abs(signal.hilbert(samples))
-        if self.config["apply_filters"]:
-            samples = signal.medfilt(samples, 5)
-        samples = [1 if sample > self.config["one_symbol_amplitude"] else 0 for sample in samples]
+        decimation = decimation_factor(sample_rate, baud_rate, self.config["decimation"])
+        if decimation > 1:
+            if self.config["apply_frequency_cut"]:
+                self.logger.warning(f"apply_frequency_cut is ignored, signal decimated by {decimation} is limited "
+                                    f"by low-pass of its baseband (set decimation to 1 to use band-pass)")
+            # low-pass of baseband limits bandwidth instead of band-pass, envelope is its magnitude
+            cutoff = min(2 * baud_rate, main_freq, 0.4 * sample_rate / decimation)
+            # one bit of silence around recording keeps smeared first and last symbol edges inside of it
+            padding = int(np.ceil(samples_per_bit / decimation))
+            with self.profiler.stage("filtering"):
+                baseband, _ = downconvert(np.pad(samples, padding * decimation), main_freq, sample_rate, decimation,
+                                          cutoff)
+            with self.profiler.stage("envelope"):
+                samples = np.abs(baseband[padding:padding + int(np.ceil(len(samples) / decimation))])
+            self.logger.debug(f"signal down-converted and decimated by {decimation}")
+        else:
+            if self.config["apply_frequency_cut"]:
+                with self.profiler.stage("filtering"):
+                    samples = self.__apply_filters(samples, main_freq, sample_rate)
+            with self.profiler.stage("envelope"):
+                samples = np.abs(signal.hilbert(samples))
+        return samples, decimation
+
+    def demodulate_channels(self, audio: Audio, carriers):
+        """
+        this method demodulates frequency division multiplex of ASK transmissions on given carriers in one pass,
+        spectrum of the recording is computed once and shared by all channels (fft filter bank),
+        every channel is then decoded like a single transmission
+        :param audio: recording with all channels
+        :param carriers: carrier frequencies of the channels in Hz
+        :return: list of DemodulatedData, in order of carriers
+        """
+        start_time = time.time()
+        self.logger.debug(f"ASK demodulation of {len(carriers)} channels started")
 
-        sectors = self.__samples_to_sectors(samples)
-        packets, bits_analysis = self.__sectors_to_packets(sectors, samples_per_bit, bytes_per_packet)
-        data, crc_check = self.__packets_to_data(packets, packet_len, use_crc)
+        sample_rate = audio.getSampleRate()
+        baud_rate = self.comm_config["baud_rate[bps]"]
+        samples_per_bit = sample_rate / baud_rate
+        decimation = decimation_factor(sample_rate, baud_rate, self.config["decimation"])
+        # neighbouring channels are rejected by low-pass of half of the carrier spacing
+        spacing = np.min(np.diff(np.sort(carriers))) if len(carriers) > 1 else np.inf
+        cutoff = min(2 * baud_rate, min(carriers), spacing / 2, 0.4 * sample_rate / decimation)
+        padding = int(np.ceil(samples_per_bit / decimation))
+        with self.profiler.stage("filtering"):
+            basebands, _ = channelize(np.pad(audio.getSamples(), padding * decimation), carriers, sample_rate,
+                                      decimation, cutoff)
+
+        demodulated = []
+        for carrier, baseband in zip(carriers, basebands):
+            self.logger.debug(f"decoding channel at {int(carrier)}Hz")
+            with self.profiler.stage("envelope"):
+                envelope = np.abs(baseband[padding:padding + int(np.ceil(len(audio.getSamples()) / decimation))])
+                # every channel of normalised multiplex is only a fraction of full scale,
+                # one symbol amplitude is taken relative to peak of the channel
+                peak = np.max(envelope)
+                if peak > 0:
+                    envelope /= peak
+            demodulated.append(self.__decode_envelope(envelope, decimation, audio))
+
+        self.logger.info(f"{len(carriers)} channels demodulated in {round(time.time() - start_time, 2)}s")
+        return demodulated
+
+    def __decode_envelope(self, samples, decimation, audio: Audio):
+        """
+        this method decides bits from envelope of the signal and decodes packets
+        :param samples: envelope (decimated by <decimation> against the recording)
+        :param decimation: decimation factor of the envelope
+        :param audio: demodulated recording
+        :return: DemodulatedData
+        """
+        samples, bits_analysis = self.__decide_bits(samples, decimation, audio)
+        data, crc_check = bits_to_data(bits_analysis.value, self.comm_config, self.logger, self.profiler)
 
         if not crc_check:
             self.logger.critical("crc failed!")
@@ -67,148 +313,48 @@ class ASK(Demodulator):
                                audio=audio,
                                crc_check_pass=crc_check)
 
-    def __samples_to_sectors(self, samples):
-        samples = np.array(copy.copy(samples))
-        centers, plateaus = signal.find_peaks(samples, plateau_size=1)
-
-        sectors = []
-        for point in zip(plateaus["left_edges"], plateaus["right_edges"], centers, plateaus["plateau_sizes"]):
-            sector = DataSector(left_edge=point[0],
-                                right_edge=point[1],
-                                center=point[2],
-                                width=point[3],
-                                value=1)
-            sectors.append(sector)
-
-        for i in reversed(range(1, len(sectors))):
-            point1 = sectors[i]
-            point2 = sectors[i - 1]
-            left_edge = point2.right_edge
-            right_edge = point1.left_edge
-            width = right_edge - left_edge
-            center = left_edge + int(width / 2)
-            new_sector = DataSector(left_edge=left_edge,
-                                    right_edge=right_edge,
-                                    center=center,
-                                    width=width,
-                                    value=0)
-            sectors.insert(i, new_sector)
-
-        return sectors
-
-    def __sectors_to_packets(self, sectors, samples_per_bit, bytes_per_packet):
-        bits_data = []
-        bits_list = []
-        for sector in sectors:
-            bits_amount = round(sector.width / samples_per_bit)
-            bits_amount = 1 if bits_amount == 0 else bits_amount
-            for x in range(bits_amount):
-                bits_list.append(sector.value)
-
-                left_edge = sector.left_edge+(samples_per_bit*x)
-                right_edge = sector.left_edge + (samples_per_bit * (x+1))
-                width = right_edge - left_edge
-                value = sector.value
-                center = int(left_edge + (width / 2))
-                bit_data = DataSector(left_edge=left_edge,
-                                      right_edge=right_edge,
-                                      width=width,
-                                      value=value,
-                                      center=center)
-
-                bits_data.append(bit_data)
-
-        bytes_list = [bits_list[i * 8:i * 8 + 8] for i in range(round(len(bits_list) / 8))]
-
-        packets_list = [bytes_list[i * bytes_per_packet:i * bytes_per_packet + bytes_per_packet] for i in
-                        range(round(len(bytes_list) / bytes_per_packet))]
-
-        return self.__replace_bits_with_byte_in_packets(packets_list), bits_data
-
-    @staticmethod
-    def __replace_bits_with_byte_in_packets(packets):
-        for packet in range(len(packets)):
-            for byte in range(len(packets[packet])):
-                packets[packet][byte] = int(''.join([str(bit) for bit in packets[packet][byte]]), 2)
-        return packets
-
-    def __packets_to_data(self, packets, packet_len, use_crc):
-        try:
-            data = bytearray()
-            calculator = Calculator(Crc8.CCITT)
-            crc_check = True
-            for packet in range(len(packets)):
-                data_in_packet = packets[packet][1:packet_len + 1]
-
-                for byte in data_in_packet:
-                    data.append(byte)
-
-                if use_crc:
-                    crc_value = packets[packet][packet_len + 1]
-                    if not self.__check_crc(packet, calculator, bytearray(data_in_packet), crc_value):
-                        crc_check = False
-
-            data = self.__remove_null_from_data(data)
-
-            return data, crc_check
-        except Exception:
-            self.logger.error("failed to decode bytes from samples")
-            return [], False
-
-    def __check_crc(self, packet_n, calculator, value, crc):
-        value_crc = calculator.checksum(value)
-        if value_crc == crc:
-            self.logger.debug(f"crc sum for packet '{packet_n}' correct!")
-            return True
-        else:
-            self.logger.error(f"crc sum for packet '{packet_n}' is incorrect! received: {value_crc} expected: {crc}")
-            return False
-
-    @staticmethod
-    def __remove_null_from_data(data):
-        data = data
-        for i in reversed(range(len(data))):
-            if data[i] == 0:
-                data.pop()
-            else:
-                break
-        return data
-
-    @staticmethod
-    def __find_main_frequency(samples, sample_rate, samples_amount):
-        fft_data = abs(np.fft.rfft(samples)) ** 2
-        # find the maximum
-        which = fft_data[1:].argmax() + 1
-        # use quadratic interpolation around the max
-        if which != len(fft_data) - 1:
-            y0, y1, y2 = np.log(fft_data[which - 1:which + 2:])
-            x1 = (y2 - y0) * .5 / (2 * y1 - y2 - y0)
-            # find the frequency and output it
-            the_freq = (which + x1) * sample_rate / samples_amount
-            return the_freq
-        else:
-            the_freq = which * sample_rate / samples_amount
-            return the_freq
+    def __decide_bits(self, samples, decimation, audio: Audio):
+        """
+        this method decides bits from envelope of the signal
+        :param samples: envelope (decimated by <decimation> against the recording)
+        :param decimation: decimation factor of the envelope
+        :param audio: demodulated recording
+        :return: digital samples and bits analysis with one sector per bit (sample indexes of the recording)
+        """
+        samples_per_bit = audio.getSampleRate() / self.comm_config["baud_rate[bps]"]
+        if self.config["apply_filters"]:
+            with self.profiler.stage("envelope"):
+                samples = signal.medfilt(samples, 5)
+        with self.profiler.stage("thresholding"):
+            centers, bits = self.__recover_symbols(samples, samples_per_bit / decimation)
+            samples = (samples > self.config["one_symbol_amplitude"]).astype(np.uint8)
+            if decimation > 1:
+                # symbols and digital samples are brought back to sample indexes of the recording
+                centers *= decimation
+                samples = np.repeat(samples, decimation)[:len(audio.getSamples())]
+        with self.profiler.stage("sectoring"):
+            left_edges = np.round(centers - samples_per_bit / 2).astype(np.int64)
+            bits_analysis = data_sectors(left_edges, np.round(centers + samples_per_bit / 2).astype(np.int64), bits)
+        return samples, bits_analysis
+
+    def __recover_symbols(self, envelope, samples_per_bit):
+        """
+        this method decides bits of the transmission with symbol timing recovery
+        (integrate-and-dump over every bit, bit clock is tracked by gardner loop instead of assumed)
+        :param envelope: envelope of the signal
+        :param samples_per_bit: nominal amount of envelope samples per bit (can be fractional)
+        :return: centers of bits in envelope samples and bits, zeros after the last one bit are silence
+        """
+        timing = SymbolTiming(samples_per_bit)
+        centers, integrals = timing.update(envelope - self.config["one_symbol_amplitude"], final=True)
+        bits = (integrals > 0).astype(np.uint8)
+        ones = np.flatnonzero(bits)
+        end = ones[-1] + 1 if len(ones) else 0
+        return centers[:end], bits[:end]
 
     @staticmethod
     def __apply_filters(samples, frequency, sample_rate):
-        offset = 100
-        _cut_freq = frequency + offset
-        _order = 2
-        nyq = 0.5 * sample_rate
-        normal_cutoff = _cut_freq / nyq
-        # Get the filter coefficients
-        b, a = signal.butter(_order, normal_cutoff, btype='low', analog=False, output='ba')  # noqa
-        samples = signal.filtfilt(b, a, samples)
-
-        _cut_freq = frequency - offset
-        _order = 2
-        nyq = 0.5 * sample_rate
-        normal_cutoff = _cut_freq / nyq
-        # Get the filter coefficients
-        b, a = signal.butter(_order, normal_cutoff, btype='high', analog=False, output='ba')  # noqa
-        samples = signal.filtfilt(b, a, samples)
-
+        samples = band_pass(samples, frequency, sample_rate, offset=100)
         samples /= np.max(np.abs(samples), axis=0)
 
         return samples
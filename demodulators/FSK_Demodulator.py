@@ -1,10 +1,85 @@
+import time
+import numpy as np
+
 from modem.interfaces import Demodulator
+from modem.utils import Audio, DemodulatedData, data_sectors
+from modem.detection import find_transmission
+from modem.framing import bits_to_data
 
 
 class FSK(Demodulator):
-    def __init__(self):
-        print("fsk init")
+    BLOCK_SAMPLES = 2 ** 20
+
+    def __init__(self, logger, config, comm_config):
+        logger.debug("FSK demodulation init")
+        self.logger = logger
+        self.config = config
+        self.comm_config = comm_config
+
+    def demodulate(self, audio: Audio):
+        def wrapper():
+            start_time = time.time()
+            data = self.__demodulate(audio)
+            end_time = time.time()
+            self.logger.info(f"message demodulated in {round(end_time - start_time, 2)}s")
+            return data
+
+        return wrapper()
+
+    def __demodulate(self, audio: Audio):
+        self.logger.debug("FSK demodulation started")
+        self.logger.debug(f"FSK demodulation loaded config: '{self.config}'")
+
+        samples = np.asarray(audio.getSamples(), dtype=np.float64)
+        sample_rate = audio.getSampleRate()
+        baud_rate = self.comm_config["baud_rate[bps]"]
+        samples_per_bit = sample_rate / baud_rate
+        frequencies = (self.config["zero_symbol_frequency[Hz]"], self.config["one_symbol_frequency[Hz]"])
+
+        with self.profiler.stage("detection"):
+            start, stop = find_transmission(samples, self.config["detection_threshold"],
+                                            max(1, int(samples_per_bit / 4)))
+        bits_amount = int(np.ceil((stop - start) / samples_per_bit))
+        self.logger.debug(f"transmission found at samples {start}-{stop} ({bits_amount} symbols)")
+
+        with self.profiler.stage("filtering"):
+            bands = np.minimum(start + np.ceil(np.arange(bits_amount + 1) * samples_per_bit).astype(int), len(samples))
+            energies = self.__tone_energies(samples, bands[:-1], int(samples_per_bit), sample_rate, frequencies)
+        with self.profiler.stage("thresholding"):
+            bits = (energies[1] > energies[0]).astype(np.uint8)
+
+        with self.profiler.stage("sectoring"):
+            digital_samples = np.zeros(len(samples), dtype=np.uint8)
+            if bits_amount:
+                digital_samples[bands[0]:bands[-1]] = np.repeat(bits, np.diff(bands))
+            bits_analysis = data_sectors(bands[:-1], bands[1:], bits)
+
+        data, crc_check = bits_to_data(bits, self.comm_config, self.logger, self.profiler)
+
+        if not crc_check:
+            self.logger.critical("crc failed!")
+
+        return DemodulatedData(demodulator=self,
+                               digital_samples=digital_samples,
+                               demodulated_data=data,
+                               bits_analysis=bits_analysis,
+                               audio=audio,
+                               crc_check_pass=crc_check)
+
+    def __tone_energies(self, samples, left_edges, window, sample_rate, frequencies):
+        """
+        this method computes energy of every tone in every symbol window (single bin DFT, same as goertzel)
+        windows are gathered into a matrix so whole blocks of symbols are detected with one matrix product
+        :return: array of shape (tones, symbols)
+        """
+        kernels = np.exp(-2j * np.pi * np.outer(np.arange(window), frequencies) / sample_rate)
+        samples = np.concatenate((samples, np.zeros(window)))
+        offsets = np.arange(window)
 
-    def demodulate(self, input_binary):
-        print("demodulating fsk")
-        return []
+        symbols_per_block = max(1, self.BLOCK_SAMPLES // max(window, 1))
+        energies = np.empty((len(frequencies), len(left_edges)))
+        for first in range(0, len(left_edges), symbols_per_block):
+            edges = left_edges[first:first + symbols_per_block]
+            windows = samples[edges[:, None] + offsets[None, :]]
+            energies[:, first:first + len(edges)] = (np.abs(windows @ kernels) ** 2).T
+        return energies
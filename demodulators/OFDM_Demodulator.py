@@ -0,0 +1,90 @@
+import time
+import numpy as np
+from scipy import signal
+
+from modem.interfaces import Demodulator
+from modem.utils import Audio, DemodulatedData, data_sectors
+from modem.framing import bits_to_data
+from modem.psk import decide
+from modem.waveforms import gray_symbols_to_bits
+from modem.ofdm import layout, training_symbol, symbols_to_samples, samples_to_symbols, equalize
+
+
+class OFDM(Demodulator):
+    def __init__(self, logger, config, comm_config):
+        logger.debug("OFDM demodulation init")
+        self.logger = logger
+        self.config = config
+        self.comm_config = comm_config
+
+    def demodulate(self, audio: Audio):
+        def wrapper():
+            start_time = time.time()
+            data = self.__demodulate(audio)
+            end_time = time.time()
+            self.logger.info(f"message demodulated in {round(end_time - start_time, 2)}s")
+            return data
+
+        return wrapper()
+
+    def __demodulate(self, audio: Audio):
+        self.logger.debug("OFDM demodulation started")
+        self.logger.debug(f"OFDM demodulation loaded config: '{self.config}'")
+
+        samples = np.asarray(audio.getSamples(), dtype=np.float64)
+        fft_size = self.config["fft_size"]
+        cyclic_prefix = self.config["cyclic_prefix"]
+        symbol_length = fft_size + cyclic_prefix
+
+        used, pilots = layout(self.config)
+        training = training_symbol(self.config)
+
+        with self.profiler.stage("detection"):
+            first_sample = self.__synchronize(samples, training, used, fft_size, cyclic_prefix)
+        with self.profiler.stage("filtering"):
+            available = max(0, (len(samples) - first_sample) // symbol_length)
+            received = samples_to_symbols(samples, first_sample, available, used, fft_size, cyclic_prefix)
+
+        # transmission ends at first symbol much weaker than training symbol
+        with self.profiler.stage("detection"):
+            power = np.mean(np.abs(received) ** 2, axis=1)
+            quiet = np.flatnonzero(power < self.config["symbol_power_threshold"] * power[0]) if available else []
+            symbols_amount = int(quiet[0]) if len(quiet) else available
+        self.logger.debug(f"training symbol found at sample {first_sample}, {max(symbols_amount - 1, 0)} data symbols")
+
+        with self.profiler.stage("thresholding"):
+            if symbols_amount > 1:
+                equalized = equalize(received[1:symbols_amount], received[0], pilots)
+                bits = gray_symbols_to_bits(decide(equalized[:, ~pilots], 4).ravel(), 2)
+            else:
+                bits = np.zeros(0, dtype=np.uint8)
+
+        with self.profiler.stage("sectoring"):
+            bands = np.minimum(first_sample + np.arange(symbols_amount + 1) * symbol_length, len(samples))
+            digital_samples = np.zeros(len(samples), dtype=np.uint8)
+            if symbols_amount > 1:
+                digital_samples[bands[1]:bands[-1]] = 1
+            bits_analysis = data_sectors(bands[:-1], bands[1:], np.arange(symbols_amount) > 0)
+
+        data, crc_check = bits_to_data(bits, self.comm_config, self.logger, self.profiler)
+
+        if not crc_check:
+            self.logger.critical("crc failed!")
+
+        return DemodulatedData(demodulator=self,
+                               digital_samples=digital_samples,
+                               demodulated_data=data,
+                               bits_analysis=bits_analysis,
+                               audio=audio,
+                               crc_check_pass=crc_check)
+
+    @staticmethod
+    def __synchronize(samples, training, used, fft_size, cyclic_prefix):
+        """
+        this method finds start of training symbol (its cyclic prefix) by correlating signal with its known body
+        """
+        template = symbols_to_samples(training[None, :], used, fft_size, cyclic_prefix)[cyclic_prefix:]
+        if len(samples) < len(template):
+            return 0
+        correlation = signal.correlate(samples, template, mode='valid', method='fft')
+        return max(0, int(np.argmax(np.abs(correlation))) - cyclic_prefix)
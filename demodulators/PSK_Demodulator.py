@@ -0,0 +1,103 @@
+from abc import abstractmethod
+import time
+import numpy as np
+
+from modem.interfaces import Demodulator
+from modem.utils import Audio, DemodulatedData, data_sectors
+from modem.detection import find_transmission, moving_average
+from modem.framing import bits_to_data
+from modem.waveforms import quadrature_carrier, gray_symbols_to_bits
+from modem.psk import recover_symbols, decide, find_sync, SYNC_WORD
+
+
+class PSK(Demodulator):
+    def __init__(self, logger, config, comm_config):
+        logger.debug(f"{self.__class__.__name__} demodulation init")
+        self.logger = logger
+        self.config = config
+        self.comm_config = comm_config
+
+    @property
+    @abstractmethod
+    def bits_per_symbol(self):
+        pass
+
+    def demodulate(self, audio: Audio):
+        def wrapper():
+            start_time = time.time()
+            data = self.__demodulate(audio)
+            end_time = time.time()
+            self.logger.info(f"message demodulated in {round(end_time - start_time, 2)}s")
+            return data
+
+        return wrapper()
+
+    def __demodulate(self, audio: Audio):
+        self.logger.debug(f"{self.__class__.__name__} demodulation started")
+        self.logger.debug(f"{self.__class__.__name__} demodulation loaded config: '{self.config}'")
+
+        samples = np.asarray(audio.getSamples(), dtype=np.float64)
+        sample_rate = audio.getSampleRate()
+        frequency = self.config["carrier_frequency[Hz]"]
+        preamble_symbols = self.config["preamble_symbols"]
+        symbol_rate = self.comm_config["baud_rate[bps]"]
+        samples_per_symbol = sample_rate / symbol_rate
+        order = 2 ** self.bits_per_symbol
+
+        with self.profiler.stage("detection"):
+            start, stop = find_transmission(samples, self.config["detection_threshold"],
+                                            max(1, int(samples_per_symbol)))
+        # rounded up: extra symbol at the end does not complete a packet, missing one would drop the last packet
+        symbols_amount = int(np.ceil((stop - start) / samples_per_symbol))
+        self.logger.debug(f"transmission found at samples {start}-{stop} ({symbols_amount} symbols)")
+
+        # mix carrier down to baseband, integrate and dump over symbol length (matched filter of rectangular pulse)
+        with self.profiler.stage("filtering"):
+            baseband = 2 * samples * np.conj(quadrature_carrier(frequency, sample_rate, 0, len(samples)))
+            baseband = moving_average(baseband, max(1, int(round(samples_per_symbol))))
+
+        with self.profiler.stage("thresholding"):
+            symbols = recover_symbols(baseband, start, symbols_amount, samples_per_symbol, order,
+                                      timing_gain=self.config["timing_loop_gain"],
+                                      phase_gain=self.config["phase_loop_gain"],
+                                      frequency_gain=self.config["frequency_loop_gain"],
+                                      block_symbols=self.config["loop_block_symbols"])
+            points = decide(symbols, order)
+        with self.profiler.stage("detection"):
+            # onset found by energy can be early or late by few symbols, so data starts after sync word
+            sync = find_sync(symbols, 2 * preamble_symbols + len(SYNC_WORD))
+        if sync is None:
+            self.logger.error("sync word of the transmission was not found!")
+            bits = np.zeros(0, dtype=np.uint8)
+        else:
+            self.logger.debug(f"sync word ends at symbol {sync}")
+            with self.profiler.stage("thresholding"):
+                bits = gray_symbols_to_bits(np.diff(points)[sync:] % order, self.bits_per_symbol)
+
+        with self.profiler.stage("sectoring"):
+            bands = np.minimum(start + np.ceil(np.arange(symbols_amount + 1) * samples_per_symbol).astype(int),
+                               len(samples))
+            digital_samples = np.zeros(len(samples), dtype=np.int64)
+            if symbols_amount:
+                digital_samples[bands[0]:bands[-1]] = np.repeat(points, np.diff(bands))
+            bits_analysis = data_sectors(bands[:-1], bands[1:], points)
+
+        data, crc_check = bits_to_data(bits, self.comm_config, self.logger, self.profiler)
+
+        if not crc_check:
+            self.logger.critical("crc failed!")
+
+        return DemodulatedData(demodulator=self,
+                               digital_samples=digital_samples,
+                               demodulated_data=data,
+                               bits_analysis=bits_analysis,
+                               audio=audio,
+                               crc_check_pass=crc_check)
+
+
+class BPSK(PSK):
+    bits_per_symbol = 1
+
+
+class QPSK(PSK):
+    bits_per_symbol = 2
@@ -1,10 +1,13 @@
-from typing import Sequence, Optional
+from typing import Sequence, Optional, List
 from matplotlib import pyplot as plt
+import tracemalloc
 import pickle
+import json
+import os
 
 from modem.processing_hub import ModulatorHub, DemodulatorHub
 from modem.program_core import program_core
-from modem.utils import ModulatedData, DemodulatedData
+from modem.utils import ModulatedData, DemodulatedData, AudioStream
 
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
@@ -17,6 +20,10 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
     command = data.args["command"]
     processing_mode = data.args["mode"]
 
+    if data.args["profile"]:
+        # peak memory of stages is measured only while allocations are traced
+        tracemalloc.start()
+
     """
     
     TODO: commit last fix (missing last bytes in modulated data package fix)
@@ -33,38 +40,92 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
 
     if command == "modulate":
         hub = ModulatorHub(logger=logger, processing_type="Modulator")
-        binary_encoded_data = hub.encode_data(data.data)
-        modulated_data: ModulatedData = hub.modulate(binary_encoded_data, data.modulators[processing_mode])
-        data_to_write = modulated_data
+        # payload is compressed before it is framed into packets (when enabled in communication config)
+        binary_encoded_data = hub.encode_data(hub.compress_data(data.data))
+        modulator = data.modulators[processing_mode]
+        stream = data.args["stream"]
+
+        if stream and (data.args["analise"] or data.args["show"]):
+            logger.warning("analysis needs whole modulated signal, stream mode will be ignored")
+            stream = False
+
+        if stream:
+            # every consumer needs its own stream because blocks are generated on the fly
+            if data.args["output"]:
+                hub.save(hub.modulate_stream(binary_encoded_data, modulator), data.args["output"])
+
+            if data.args["play"]:
+                hub.play(hub.modulate_stream(binary_encoded_data, modulator))
+
+        else:
+            modulated_data: ModulatedData = hub.modulate(binary_encoded_data, modulator)
+            data_to_write = modulated_data
 
-        if data.args["output"]:
-            hub.save(modulated_data, data.args["output"])
+            if data.args["output"]:
+                hub.save(modulated_data, data.args["output"])
 
-        if data.args["play"]:
-            hub.play(modulated_data)
+            if data.args["play"]:
+                hub.play(modulated_data)
 
-        if data.args["analise"] or data.args["show"]:
-            hub.analise_modulated_data(modulated_data)
+            if data.args["analise"] or data.args["show"]:
+                hub.analise_modulated_data(modulated_data)
 
     elif command == "demodulate":
         hub = DemodulatorHub(logger=logger, processing_type="Demodulator")
-        demodulated_data: DemodulatedData = hub.demodulate(data.data, data.demodulators[processing_mode])
-        data_to_write = demodulated_data
-        if demodulated_data.crc_check_pass:
-            try:
-                logger.info(f"demodulated data: '{demodulated_data.demodulated_data.decode()}'")
-            except UnicodeDecodeError:
-                logger.info("demodulated data is binary")
-
+        demodulator = data.demodulators[processing_mode]
+
+        if data.args["stream"] and (data.args["analise"] or data.args["show"]):
+            logger.warning("analysis needs whole demodulated signal, stream mode will be ignored")
+
+        if data.args["channels"]:
+            if data.args["stream"]:
+                logger.warning("channels are demodulated from whole recording, stream mode will be ignored")
+
+            channels: List[DemodulatedData] = hub.demodulate_channels(data.data, demodulator, data.args["channels"])
+            data_to_write = channels
+            for carrier, demodulated_data in zip(data.args["channels"], channels):
+                if not demodulated_data.crc_check_pass:
+                    logger.error(f"crc check failed for channel at {int(carrier)}Hz! received data is corrupted")
+                    continue
+                logger.info(f"demodulated data of channel at {int(carrier)}Hz: {bytes(demodulated_data.demodulated_data)}")
+
+                if data.args["output"]:
+                    # every channel is saved next to given path with its carrier in the name
+                    root, extension = os.path.splitext(data.args["output"])
+                    hub.save(demodulated_data, f"{root}_{int(carrier)}Hz{extension}")
+
+            if data.args["analise"] or data.args["show"]:
+                logger.warning("analysis shows only the first channel")
+                hub.analise_demodulated_data(channels[0])
+
+        elif isinstance(data.data, AudioStream):
+            packets = hub.demodulate_stream(data.data, demodulator)
             if data.args["output"]:
-                hub.save(demodulated_data, data.args["output"])
+                hub.save(packets, data.args["output"])
+            else:
+                for packet in packets:
+                    if not packet.crc_check_pass:
+                        logger.error(f"crc check failed for packet '{packet.index}'! received data is corrupted")
+                    logger.info(f"demodulated packet '{packet.index}': {bytes(packet.data)}")
 
         else:
-            logger.error("crc check failed! received data is corrupted")
+            demodulated_data: DemodulatedData = hub.demodulate(data.data, demodulator, workers=data.args["workers"])
+            data_to_write = demodulated_data
+            if demodulated_data.crc_check_pass:
+                try:
+                    logger.info(f"demodulated data: '{demodulated_data.demodulated_data.decode()}'")
+                except UnicodeDecodeError:
+                    logger.info("demodulated data is binary")
 
+                if data.args["output"]:
+                    hub.save(demodulated_data, data.args["output"])
 
-        if data.args["analise"] or data.args["show"]:
-            hub.analise_demodulated_data(demodulated_data)
+            else:
+                logger.error("crc check failed! received data is corrupted")
+
+
+            if data.args["analise"] or data.args["show"]:
+                hub.analise_demodulated_data(demodulated_data)
 
     else:
         raise TypeError(f"program can be run either in modulate or demodulate mode! '{command}' is not valid")
@@ -79,6 +140,12 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
 
         plt.savefig(data.args["analise"])
 
+    if data.args["profile"]:
+        logger.info(f"saving profile to '{data.args['profile']}'")
+        with open(data.args["profile"], 'w') as file:
+            json.dump({"command": command, "mode": processing_mode, "stages": hub.profiler.report()}, file, indent=4)
+        tracemalloc.stop()
+
     if data.args["show"]:
         logger.info("showing analysis...")
         plt.show()
@@ -0,0 +1,32 @@
+import numpy as np
+
+CRC8_POLYNOMIAL = 0x07  # CRC-8/CCITT (x^8 + x^2 + x + 1, no reflection, initial value and final xor 0)
+
+
+def crc8_table(polynomial=CRC8_POLYNOMIAL):
+    """
+    this method precomputes crc of every byte value, so crc of a message is one table lookup per byte
+    :param polynomial: generator polynomial without x^8 term
+    :return: uint8 array of 256 crc values
+    """
+    table = np.arange(256, dtype=np.uint16)
+    for _ in range(8):
+        table = np.where(table & 0x80, (table << 1) ^ polynomial, table << 1) & 0xFF
+    return table.astype(np.uint8)
+
+
+CRC8_TABLE = crc8_table()
+
+
+def crc8(packets):
+    """
+    this method computes crc8 of every row of packet matrix at once,
+    rows are processed together column by column (one table lookup for all packets per byte)
+    :param packets: 2d uint8 matrix with one message per row
+    :return: uint8 array of crc values, one per row
+    """
+    packets = np.asarray(packets, dtype=np.uint8)
+    crc = np.zeros(len(packets), dtype=np.uint8)
+    for column in packets.T:
+        crc = CRC8_TABLE[crc ^ column]
+    return crc
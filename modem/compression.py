@@ -0,0 +1,109 @@
+import zlib
+import lzma
+import bz2
+
+STORED = 0  # header of payload sent as it is, because no method made it smaller
+STREAM_END = 0xFF  # appended to compressed payload ending with null byte, so framing does not strip its end
+
+LZMA_FILTERS = [{"id": lzma.FILTER_LZMA2, "preset": 9 | lzma.PRESET_EXTREME}]
+
+
+def zlib_compress(data):
+    # raw deflate, container header and adler32 are not needed as every packet has its own crc
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+
+def lzma_compress(data):
+    # raw lzma2 stream, xz container would add around 60 bytes to every payload
+    return lzma.compress(data, format=lzma.FORMAT_RAW, filters=LZMA_FILTERS)
+
+
+METHODS = {
+    1: ("zlib", zlib_compress, lambda: zlib.decompressobj(-15)),
+    2: ("bz2", lambda data: bz2.compress(data, 9), bz2.BZ2Decompressor),
+    3: ("lzma", lzma_compress, lambda: lzma.LZMADecompressor(format=lzma.FORMAT_RAW, filters=LZMA_FILTERS)),
+}
+
+
+def compress_with(method, data):
+    """
+    this method compresses payload with one of <METHODS>, compressed payload which ends with null byte
+    gets <STREAM_END> byte, as framing strips trailing null bytes
+    :param method: header of the method
+    :param data: bytes of payload
+    :return: header byte followed by compressed payload
+    """
+    compressed = METHODS[method][1](bytes(data))
+    if compressed.endswith(b'\x00'):
+        compressed += bytes([STREAM_END])
+    return bytes([method]) + compressed
+
+
+def compress_payload(data):
+    """
+    this method compresses payload with every method and keeps the smallest result,
+    first byte of the result tells receiver which method was used (payload is stored when nothing made it smaller)
+    :param data: bytes of payload
+    :return: header byte followed by (compressed) payload and name of used method
+    """
+    data = bytes(data)
+    result, name = bytes([STORED]) + data, "stored"
+    for method, (method_name, _, _) in METHODS.items():
+        compressed = compress_with(method, data)
+        if len(compressed) < len(result):
+            result, name = compressed, method_name
+    return result, name
+
+
+def decompressor(header):
+    """
+    this method creates incremental decompressor of method written in payload header
+    :param header: first byte of received payload
+    :return: decompressor object with decompress() and eof, None for stored payload
+    """
+    if header == STORED:
+        return None
+    if header not in METHODS:
+        raise ValueError(f"unknown compression method '{header}' in payload header")
+    return METHODS[header][2]()
+
+
+def decompress_chunk(method, chunk):
+    """
+    this method feeds next part of compressed payload to decompressor, only <STREAM_END> byte and null padding
+    can follow the end of stream, any other data after it means that the payload is not a single compressed payload
+    :param method: decompressor created by decompressor()
+    :param chunk: next bytes of compressed payload
+    :return: decompressed bytes available so far
+    """
+    if method.eof:
+        unused, data = bytes(chunk), b''
+    else:
+        try:
+            data = method.decompress(chunk)
+        except (zlib.error, lzma.LZMAError, OSError) as error:
+            raise ValueError(f"compressed payload is corrupted: {error}") from error
+        unused = method.unused_data if method.eof else b''
+    if unused.rstrip(b'\x00') not in (b'', bytes([STREAM_END])):
+        raise ValueError("data follows the end of compressed payload, payloads were joined or header is corrupted")
+    return data
+
+
+def decompress_payload(data):
+    """
+    this method restores payload made by compress_payload(), null bytes after the end of compressed stream
+    (padding of the last packet) are ignored, truncated stream or any other data after it raises ValueError
+    :param data: received bytes starting with header byte
+    :return: original payload
+    """
+    data = bytes(data)
+    if not data:
+        raise ValueError("received payload has no compression header")
+    method = decompressor(data[0])
+    if method is None:
+        return data[1:]
+    payload = decompress_chunk(method, data[1:])
+    if not method.eof:
+        raise ValueError("compressed payload is truncated")
+    return payload
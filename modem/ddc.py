@@ -0,0 +1,88 @@
+from scipy import signal, fft
+import numpy as np
+
+from modem.filters import design_filter
+from modem.waveforms import quadrature_carrier
+
+
+def decimation_factor(sample_rate, symbol_rate, decimation, min_samples_per_symbol=8):
+    """
+    this method limits requested decimation so every symbol still spans at least <min_samples_per_symbol> samples
+    :param sample_rate: sample rate of the recording in Hz
+    :param symbol_rate: symbols per second
+    :param decimation: requested decimation factor
+    :return: decimation factor that can be used (1 means no decimation)
+    """
+    return int(max(1, min(decimation, sample_rate / symbol_rate // min_samples_per_symbol)))
+
+
+def decimation_taps(sample_rate, decimation, cutoff):
+    """
+    this method designs anti-aliasing fir for decimation of signal which is low-pass filtered at <cutoff> later,
+    so only components folding into the kept band have to be rejected and filter can be short
+    :param sample_rate: sample rate before decimation in Hz
+    :param decimation: decimation factor
+    :param cutoff: highest kept frequency in Hz (has to be below new nyquist frequency)
+    :return: fir taps (odd amount, linear phase)
+    """
+    transition = sample_rate / decimation - 2 * cutoff
+    numtaps = int(np.ceil(4 * sample_rate / transition)) | 1
+    return signal.firwin(numtaps, sample_rate / decimation / 2, fs=sample_rate)
+
+
+def downconvert(samples, frequency, sample_rate, decimation, cutoff, order=4):
+    """
+    this method moves signal around <frequency> to 0 Hz, decimates it with polyphase anti-aliasing filter
+    and low-pass filters it at the reduced sample rate, so only mixing runs at sample rate of the recording
+    :param samples: real audio samples
+    :param frequency: carrier frequency in Hz
+    :param sample_rate: sample rate of the samples in Hz
+    :param decimation: decimation factor
+    :param cutoff: cutoff of the low-pass in Hz (half of kept bandwidth, has to be below new nyquist frequency)
+    :param order: order of the low-pass
+    :return: complex baseband samples (magnitude is equal to carrier amplitude) and their sample rate
+    """
+    mixer = np.conj(quadrature_carrier(int(round(frequency)), sample_rate, 0, len(samples)))
+    baseband = 2 * np.asarray(samples, dtype=np.float64) * mixer
+    if decimation > 1:
+        # polyphase fir computes only kept samples and compensates its own delay,
+        # real and imaginary parts are decimated apart as real filtering is faster
+        taps = decimation_taps(sample_rate, decimation, cutoff)
+        baseband = signal.resample_poly(baseband.real, 1, decimation, window=taps) + \
+            1j * signal.resample_poly(baseband.imag, 1, decimation, window=taps)
+    # zero phase filter, so symbol edges are not shifted against original samples
+    baseband = signal.sosfiltfilt(design_filter('low', order, cutoff, sample_rate / decimation), baseband)
+    return baseband, sample_rate / decimation
+
+
+def channelize(samples, frequencies, sample_rate, decimation, cutoff, order=4):
+    """
+    this method down-converts many channels of frequency division multiplex at once (fft filter bank),
+    spectrum of the recording is computed once and every channel is cut out of it around its carrier,
+    weighted by the same magnitude response as zero phase low-pass of downconvert() and transformed back
+    with inverse fft of already decimated length
+    :param samples: real audio samples
+    :param frequencies: carrier frequencies of the channels in Hz
+    :param sample_rate: sample rate of the samples in Hz
+    :param decimation: decimation factor
+    :param cutoff: cutoff of the low-pass in Hz (half of kept bandwidth, has to be below new nyquist frequency)
+    :param order: order of the low-pass
+    :return: list of complex baseband samples (one array per channel, magnitude is equal to carrier amplitude)
+    and their sample rate
+    """
+    samples_amount = len(samples)
+    # output length is fast for fft and fft length is its multiple, so decimation needs no resampling
+    length = fft.next_fast_len(max(1, -(-samples_amount // decimation)))
+    spectrum = fft.rfft(np.asarray(samples, dtype=np.float64), length * decimation)
+
+    offsets = fft.fftfreq(length, 1 / length).astype(np.int64)  # bin offsets from carrier in ifft order
+    bin_width = sample_rate / (length * decimation)
+    response = 1 / (1 + (np.abs(offsets) * bin_width / cutoff) ** (2 * order))
+    basebands = []
+    for frequency in frequencies:
+        bins = int(round(frequency / bin_width)) + offsets
+        valid = (bins >= 0) & (bins < len(spectrum))
+        # positive frequencies only, so result is analytic signal, factor 2 restores carrier amplitude
+        channel = np.where(valid, spectrum[np.where(valid, bins, 0)], 0) * response
+        basebands.append(2 / decimation * fft.ifft(channel)[:-(-samples_amount // decimation)])
+    return basebands, sample_rate / decimation
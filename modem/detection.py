@@ -0,0 +1,156 @@
+import numpy as np
+
+CARRIER_SEGMENT = 4096
+CARRIER_SEGMENTS = 16
+SILENCE_LEVEL = 1e-3
+TONE_FRACTION = 0.3
+
+
+def moving_average(samples, window):
+    """
+    this method computes centered moving average (same as np.convolve(..., mode='same'))
+    using cumulative sum, so its cost does not depend on window length
+    """
+    samples = np.asarray(samples)
+    left = window // 2
+    padded = np.concatenate((np.zeros(left + 1, dtype=samples.dtype), samples,
+                             np.zeros(window - left - 1, dtype=samples.dtype)))
+    summed = np.cumsum(padded)
+    return (summed[window:window + len(samples)] - summed[:len(samples)]) / window
+
+
+def run_lengths(values):
+    """
+    this method splits signal into runs of equal consecutive values in linear time
+    :param values: 1d signal (for example thresholded digital samples)
+    :return: start index, length and value of every run as numpy arrays
+    """
+    values = np.asarray(values)
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), values[:0]
+    starts = np.concatenate(([0], np.flatnonzero(values[1:] != values[:-1]) + 1))
+    lengths = np.diff(np.append(starts, len(values)))
+    return starts, lengths, values[starts]
+
+
+def find_transmission(samples, threshold, window):
+    """
+    this method finds where smoothed signal power crosses <threshold> between noise floor and peak power
+    :param samples: audio samples
+    :param threshold: crossing level in range 0-1 (0 - noise floor, 1 - peak power)
+    :param window: length of moving average used to smooth signal power
+    :return: index of first and one past last sample of transmission
+    """
+    if len(samples) == 0:
+        return 0, 0
+    power = moving_average(np.asarray(samples, dtype=np.float64) ** 2, window)
+    # percentile instead of max so single noise spikes do not move the crossing level,
+    # quietest smoothed power is the floor, as silence can be shorter than any percentile of long transmission
+    floor, peak = np.min(power), np.percentile(power, 99)
+    loud = np.flatnonzero(power > floor + threshold * (peak - floor))
+    if len(loud) == 0:
+        return 0, 0
+    return int(loud[0]), int(loud[-1]) + 1
+
+
+def find_main_frequency(samples, sample_rate, expected=None):
+    """
+    this method finds frequency of the strongest tone in the signal,
+    only a bounded amount of segments spread over the recording is analysed, so cost does not depend on its length
+    :param samples: audio samples
+    :param sample_rate: sample rate in Hz
+    :param expected: configured carrier frequency, it is returned without spectral search
+                     when tone at this frequency holds most of signal energy
+    :return: frequency in Hz
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    segment = min(CARRIER_SEGMENT, len(samples))
+    if segment < 3:
+        return float(expected or 0)
+    starts = np.unique(np.linspace(0, len(samples) - segment, CARRIER_SEGMENTS).astype(int))
+    segments = samples[starts[:, None] + np.arange(segment)[None, :]]
+    return CarrierEstimator(sample_rate, expected, segment).update(segments.ravel()).frequency
+
+
+class CarrierEstimator:
+    """
+    this class estimates carrier frequency of a stream from its first non silent segments
+    (welch averaged spectrum with quadratic interpolation of the peak),
+    estimate is cached once <segments> segments (or <max_samples> samples of any level) are analysed
+    and later samples are ignored
+    """
+    def __init__(self, sample_rate, expected=None, segment=CARRIER_SEGMENT, segments=CARRIER_SEGMENTS,
+                 max_samples=None):
+        self.sample_rate = sample_rate
+        self.expected = expected
+        self.segment = segment
+        self.segments = segments
+        self.max_samples = max_samples
+        self.__window = np.hanning(segment)
+        self.__spectrum = np.zeros(segment // 2 + 1)
+        self.__tone_power = 0.0
+        self.__energy = 0.0
+        self.__analysed = 0
+        self.__consumed = 0
+        self.__buffer = np.zeros(0)
+        self.__frequency = None
+
+    @property
+    def complete(self):
+        return self.__frequency is not None
+
+    @property
+    def frequency(self):
+        """
+        this method returns cached estimate or estimate from segments analysed so far
+        """
+        if self.__frequency is not None:
+            return self.__frequency
+        return self.__estimate()
+
+    def update(self, samples):
+        """
+        this method analyses next samples of the stream
+        :return: self, so calls can be chained
+        """
+        if self.complete:
+            return self
+
+        self.__consumed += len(samples)
+        self.__buffer = np.concatenate((self.__buffer, np.asarray(samples, dtype=np.float64)))
+        amount = len(self.__buffer) // self.segment
+        segments = self.__buffer[:amount * self.segment].reshape(amount, self.segment)
+        self.__buffer = self.__buffer[amount * self.segment:]
+
+        # silent segments carry no information about carrier
+        segments = segments[np.sqrt(np.mean(segments ** 2, axis=1)) > SILENCE_LEVEL]
+        segments = segments[:self.segments - self.__analysed] * self.__window
+        self.__spectrum += np.sum(np.abs(np.fft.rfft(segments, axis=1)) ** 2, axis=0)
+        if self.expected is not None:
+            # goertzel: one dft bin evaluated at configured frequency
+            kernel = np.exp(-2j * np.pi * self.expected / self.sample_rate * np.arange(self.segment))
+            self.__tone_power += np.sum(np.abs(segments @ kernel) ** 2)
+            self.__energy += np.sum(segments ** 2)
+        self.__analysed += len(segments)
+
+        if self.__analysed >= self.segments or self.max_samples is not None and self.__consumed >= self.max_samples:
+            self.__frequency = self.__estimate()
+            self.__buffer = np.zeros(0)
+        return self
+
+    def __estimate(self):
+        if self.__analysed == 0:
+            return float(self.expected or 0)
+
+        # windowed pure tone gives |X|^2 / energy = sum(w)^2 / (2 * sum(w^2)), so fraction of pure tone is 1
+        tone_gain = np.sum(self.__window) ** 2 / (2 * np.sum(self.__window ** 2))
+        if self.expected is not None and self.__tone_power >= TONE_FRACTION * tone_gain * self.__energy:
+            return float(self.expected)
+
+        which = int(self.__spectrum[1:].argmax()) + 1
+        if which == len(self.__spectrum) - 1 or np.min(self.__spectrum[which - 1:which + 2]) <= 0:
+            return which * self.sample_rate / self.segment
+        # use quadratic interpolation around the max
+        y0, y1, y2 = np.log(self.__spectrum[which - 1:which + 2])
+        x1 = (y2 - y0) * .5 / (2 * y1 - y2 - y0)
+        return (which + x1) * self.sample_rate / self.segment
@@ -0,0 +1,296 @@
+from abc import ABC, abstractmethod
+import numpy as np
+
+GF_POLYNOMIAL = 0x11D  # primitive polynomial of GF(2^8) (x^8 + x^4 + x^3 + x^2 + 1)
+VITERBI_BLOCK = 4096  # packets decoded at once by viterbi decoder (decisions take 64 bytes per packet and bit)
+
+
+def gf_tables(polynomial=GF_POLYNOMIAL):
+    """
+    this method builds exponent and logarithm tables of GF(2^8) with generator 2,
+    exponent table is doubled so product of two elements needs no modulo
+    :return: exponent table (512 values) and logarithm table (256 values, log of 0 is unused)
+    """
+    exp = np.zeros(512, dtype=np.int64)
+    log = np.zeros(256, dtype=np.int64)
+    value = 1
+    for power in range(255):
+        exp[power] = value
+        log[value] = power
+        value <<= 1
+        if value & 0x100:
+            value ^= polynomial
+    exp[255:510] = exp[:255]
+    return exp, log
+
+
+GF_EXP, GF_LOG = gf_tables()
+
+
+def gf_multiply(a, b):
+    """
+    this method multiplies arrays of GF(2^8) elements element-wise
+    """
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    return np.where((a == 0) | (b == 0), 0, GF_EXP[GF_LOG[a] + GF_LOG[b]])
+
+
+class Code(ABC):
+    """
+    this class is interface of forward error correction codes,
+    every packet body (data and crc) is encoded into one codeword, start and stop byte stay uncoded for framing
+    """
+    @abstractmethod
+    def coded_length(self, body_len):
+        """
+        :param body_len: amount of bytes of packet body
+        :return: amount of bytes of encoded body
+        """
+        pass
+
+    @abstractmethod
+    def encode(self, bodies):
+        """
+        :param bodies: 2d uint8 matrix with one packet body per row
+        :return: 2d uint8 matrix with one encoded body per row
+        """
+        pass
+
+    @abstractmethod
+    def decode(self, coded, body_len):
+        """
+        :param coded: 2d uint8 matrix with one received encoded body per row
+        :param body_len: amount of bytes of packet body
+        :return: 2d uint8 matrix of decoded bodies and amount of corrected bits or symbols in every row
+        (-1 for rows which could not be corrected, they are returned as received)
+        """
+        pass
+
+
+class NoCode(Code):
+    def coded_length(self, body_len):
+        return body_len
+
+    def encode(self, bodies):
+        return bodies
+
+    def decode(self, coded, body_len):
+        return coded, np.zeros(len(coded), dtype=np.int64)
+
+
+class ReedSolomon(Code):
+    """
+    this class implements systematic reed-solomon code over GF(2^8) (roots of generator are 2^0 ... 2^(parity - 1)),
+    <parity> bytes are appended to every body and up to <parity> / 2 wrong bytes are corrected,
+    encoding and syndromes are computed for all packets at once, only damaged packets are decoded one by one
+    """
+    def __init__(self, parity):
+        if parity < 2 or parity % 2:
+            raise ValueError(f"reed-solomon needs even amount of parity bytes (got {parity})")
+        self.parity = parity
+        # generator polynomial, highest power first
+        generator = np.array([1])
+        for power in range(parity):
+            generator = np.concatenate((generator, [0])) ^ \
+                np.concatenate(([0], gf_multiply(generator, GF_EXP[power])))
+        self.generator = generator
+
+    def coded_length(self, body_len):
+        if body_len + self.parity > 255:
+            raise ValueError(f"reed-solomon codeword can not be longer than 255 bytes (got {body_len + self.parity})")
+        return body_len + self.parity
+
+    def encode(self, bodies):
+        bodies = np.asarray(bodies, dtype=np.uint8)
+        # remainder of division by generator, shift register runs over columns for all rows at once
+        remainder = np.zeros((len(bodies), self.parity), dtype=np.int64)
+        for column in bodies.T:
+            feedback = column ^ remainder[:, 0]
+            remainder = np.hstack((remainder[:, 1:], np.zeros((len(bodies), 1), dtype=np.int64)))
+            remainder ^= gf_multiply(feedback[:, None], self.generator[None, 1:])
+        return np.hstack((bodies, remainder.astype(np.uint8)))
+
+    def decode(self, coded, body_len):
+        coded = np.array(coded, dtype=np.uint8)
+        syndromes = np.zeros((len(coded), self.parity), dtype=np.int64)
+        roots = GF_EXP[np.arange(self.parity)]
+        for column in coded.T:
+            syndromes = gf_multiply(syndromes, roots[None, :]) ^ column[:, None]
+
+        corrected = np.zeros(len(coded), dtype=np.int64)
+        for row in np.flatnonzero(np.any(syndromes, axis=1)):
+            corrected[row] = self.__correct(coded[row], syndromes[row].tolist())
+        return coded[:, :body_len], corrected
+
+    def __correct(self, codeword, syndromes):
+        """
+        this method corrects one codeword in place (berlekamp-massey, chien search and forney algorithm)
+        :return: amount of corrected bytes or -1 when codeword has too many errors
+        """
+        locator = self.__error_locator(syndromes)
+        errors = len(locator) - 1
+        if 2 * errors > self.parity:
+            return -1
+
+        # roots of error locator are inverses of error locations (powers of x counted from the last byte)
+        powers = np.arange(len(codeword))
+        values = np.zeros(len(codeword), dtype=np.int64)
+        for coefficient in locator[::-1]:
+            values = gf_multiply(values, GF_EXP[(255 - powers) % 255]) ^ coefficient
+        locations = np.flatnonzero(values == 0)
+        if len(locations) != errors:
+            return -1
+
+        # error evaluator is syndrome polynomial multiplied by locator, truncated to <parity> terms
+        evaluator = [0] * self.parity
+        for i, syndrome in enumerate(syndromes):
+            for j, coefficient in enumerate(locator[:self.parity - i]):
+                evaluator[i + j] ^= int(gf_multiply(syndrome, coefficient))
+        for power in locations.tolist():
+            inverse = int(GF_EXP[(255 - power) % 255])
+            numerator = self.__evaluate(evaluator, inverse)
+            # formal derivative in GF(2^m) keeps only odd powers
+            denominator = self.__evaluate([coefficient if i % 2 else 0 for i, coefficient in enumerate(locator)][1:],
+                                          inverse)
+            if denominator == 0:
+                return -1
+            magnitude = int(gf_multiply(gf_multiply(GF_EXP[power], numerator),
+                                        GF_EXP[255 - GF_LOG[denominator]]))
+            codeword[len(codeword) - 1 - power] ^= magnitude
+        return errors
+
+    def __error_locator(self, syndromes):
+        """
+        this method finds error locator polynomial (lowest power first) with berlekamp-massey algorithm
+        """
+        locator, previous = [1], [1]
+        length, shift, previous_discrepancy = 0, 1, 1
+        for n in range(self.parity):
+            discrepancy = syndromes[n]
+            for i in range(1, min(length + 1, len(locator))):
+                discrepancy ^= int(gf_multiply(locator[i], syndromes[n - i]))
+            if discrepancy == 0:
+                shift += 1
+                continue
+            scale = int(gf_multiply(discrepancy, GF_EXP[255 - GF_LOG[previous_discrepancy]]))
+            updated = locator + [0] * max(0, len(previous) + shift - len(locator))
+            for i, coefficient in enumerate(previous):
+                updated[i + shift] ^= int(gf_multiply(scale, coefficient))
+            if 2 * length <= n:
+                previous, length, previous_discrepancy, shift = locator, n + 1 - length, discrepancy, 1
+            else:
+                shift += 1
+            locator = updated
+        # degree of locator lower than <length> means too many errors, no chien search will find all roots
+        return (locator + [0] * (length + 1))[:length + 1]
+
+    @staticmethod
+    def __evaluate(polynomial, x):
+        """
+        this method evaluates polynomial (lowest power first) at <x>
+        """
+        value = 0
+        for coefficient in polynomial[::-1]:
+            value = int(gf_multiply(value, x)) ^ coefficient
+        return value
+
+
+class Convolutional(Code):
+    """
+    this class implements rate 1/2 convolutional code with constraint length 7 (generators 171 and 133 octal),
+    every body is terminated with 6 zero bits, so decoder knows the final state,
+    hard decision viterbi decoder runs over all packets at once (path metrics of 64 states for every packet)
+    """
+    GENERATORS = (0o171, 0o133)
+    CONSTRAINT = 7
+
+    def __init__(self):
+        self.memory = self.CONSTRAINT - 1
+        states = np.arange(2 ** self.memory)
+        # state holds previous input bits, the newest one in the highest bit,
+        # both predecessors of every state differ only in the oldest bit
+        self.inputs = states >> (self.memory - 1)
+        self.predecessors = np.stack((((states << 1) & (2 ** self.memory - 1)),
+                                      ((states << 1) & (2 ** self.memory - 1)) | 1))
+        registers = (self.inputs << self.memory)[None, :] | self.predecessors
+        outputs = np.stack([self.__parity(registers & generator) for generator in self.GENERATORS], axis=-1)
+        # hamming distance of every received pair of bits (as number 0 - 3) to output of every transition
+        pairs = np.array([[0, 0], [0, 1], [1, 0], [1, 1]])
+        self.distances = np.sum(pairs[:, None, None, :] != outputs[None, :, :, :], axis=-1).astype(np.int32)
+
+    def coded_length(self, body_len):
+        return -(-2 * (body_len * 8 + self.memory) // 8)
+
+    def encode(self, bodies):
+        bits = np.unpackbits(np.asarray(bodies, dtype=np.uint8), axis=1)
+        bits = np.hstack((np.zeros((len(bits), self.memory), dtype=np.uint8), bits,
+                          np.zeros((len(bits), self.memory), dtype=np.uint8)))
+        steps = bits.shape[1] - self.memory
+        coded = np.zeros((len(bits), steps, len(self.GENERATORS)), dtype=np.uint8)
+        for i, generator in enumerate(self.GENERATORS):
+            for tap in range(self.CONSTRAINT):
+                # tap of the highest generator bit multiplies current input bit
+                if generator >> (self.CONSTRAINT - 1 - tap) & 1:
+                    coded[:, :, i] ^= bits[:, self.memory - tap:self.memory - tap + steps]
+        return np.packbits(coded.reshape(len(bits), -1), axis=1)
+
+    def decode(self, coded, body_len):
+        steps = body_len * 8 + self.memory
+        received = np.unpackbits(np.asarray(coded, dtype=np.uint8), axis=1)[:, :2 * steps]
+        # received pair of bits as one number (0 - 3), its distance to every transition is looked up
+        received = received.reshape(len(coded), steps, 2) @ np.array([2, 1], dtype=np.uint8)
+        bodies = np.zeros((len(coded), body_len), dtype=np.uint8)
+        corrected = np.zeros(len(coded), dtype=np.int64)
+        for first in range(0, len(coded), VITERBI_BLOCK):
+            bits, errors = self.__viterbi(received[first:first + VITERBI_BLOCK], steps)
+            bodies[first:first + VITERBI_BLOCK] = np.packbits(bits[:, :body_len * 8], axis=1)
+            corrected[first:first + VITERBI_BLOCK] = errors
+        return bodies, corrected
+
+    def __viterbi(self, received, steps):
+        """
+        this method finds the most likely input bits of every packet (path with the lowest hamming distance)
+        :return: decoded bits and amount of corrected coded bits of every packet
+        """
+        rows = np.arange(len(received))
+        # unreachable states start far behind, metrics of a packet never grow more than 2 per step
+        metrics = np.full((len(received), 2 ** self.memory), 4 * steps, dtype=np.int32)
+        metrics[:, 0] = 0
+        decisions = np.zeros((steps, len(received), 2 ** self.memory), dtype=np.uint8)
+        for step in range(steps):
+            candidates = metrics[:, self.predecessors] + self.distances[received[:, step]]
+            decisions[step] = candidates[:, 1] < candidates[:, 0]
+            metrics = np.minimum(candidates[:, 0], candidates[:, 1])
+
+        # every packet ends in state 0 because of tail bits
+        states = np.zeros(len(received), dtype=np.int64)
+        bits = np.zeros((len(received), steps), dtype=np.uint8)
+        for step in range(steps - 1, -1, -1):
+            bits[:, step] = self.inputs[states]
+            states = self.predecessors[decisions[step, rows, states], states]
+        return bits, metrics[:, 0]
+
+    @staticmethod
+    def __parity(values):
+        values = np.asarray(values)
+        parity = np.zeros(values.shape, dtype=np.uint8)
+        while np.any(values):
+            parity ^= (values & 1).astype(np.uint8)
+            values = values >> 1
+        return parity
+
+
+def fec_code(comm_config) -> Code:
+    """
+    this method builds forward error correction code selected in communication config
+    ("fec": "none", "reed_solomon" (with "fec_parity[bytes]") or "convolutional")
+    """
+    name = comm_config.get("fec", "none")
+    if name == "none":
+        return NoCode()
+    if name == "reed_solomon":
+        return ReedSolomon(comm_config.get("fec_parity[bytes]", 4))
+    if name == "convolutional":
+        return Convolutional()
+    raise ValueError(f"'{name}' forward error correction is not implemented")
@@ -0,0 +1,91 @@
+from functools import lru_cache
+from scipy import signal
+import numpy as np
+
+FILTER_CACHE_SIZE = 64
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def design_filter(btype: str, order: int, cutoff: float, sample_rate: int) -> np.ndarray:
+    """
+    this method designs butterworth filter as second order sections, designed filters are memoized
+    :param btype: filter type ('low', 'high', 'band', 'bandstop')
+    :param order: filter order
+    :param cutoff: cutoff frequency in Hz (tuple of two for band filters)
+    :param sample_rate: sample rate in Hz
+    :return: array of second order sections (shared between callers, must not be modified)
+    """
+    sos = signal.butter(order, cutoff, btype=btype, analog=False, output='sos', fs=sample_rate)  # noqa
+    return sos
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def band_pass_sos(frequency: int, offset: int, sample_rate: int, order: int = 2) -> np.ndarray:
+    """
+    this method returns low pass at <frequency + offset> cascaded with high pass at <frequency - offset>
+    """
+    sos = np.vstack((design_filter('low', order, frequency + offset, sample_rate),
+                     design_filter('high', order, frequency - offset, sample_rate)))
+    return sos
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def band_pass_gain(frequency: int, offset: int, sample_rate: int, order: int = 2) -> float:
+    """
+    this method returns magnitude of band-pass response at its center frequency (single pass)
+    """
+    _, response = signal.sosfreqz(band_pass_sos(frequency, offset, sample_rate, order), worN=[frequency],
+                                  fs=sample_rate)
+    return float(np.abs(response[0]))
+
+
+def band_pass(samples, frequency, sample_rate, offset=100, order=2):
+    """
+    this method applies zero phase band-pass around <frequency> to the whole signal
+    frequency is rounded to whole Hz so estimated carriers can share one designed filter
+    """
+    sos = band_pass_sos(int(round(frequency)), offset, sample_rate, order)
+    return signal.sosfiltfilt(sos, samples)
+
+
+def band_pass_causal(samples, frequency, sample_rate, offset=100, order=2, zi=None):
+    """
+    this method applies causal band-pass around <frequency> to one block of a stream
+    :param zi: filter state returned for previous block (None for start of the stream)
+    :return: filtered block and filter state for next block
+    """
+    sos = band_pass_sos(int(round(frequency)), offset, sample_rate, order)
+    if zi is None:
+        zi = np.zeros((sos.shape[0], 2))
+    return signal.sosfilt(sos, samples, zi=zi)
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def hilbert_taps(numtaps: int) -> np.ndarray:
+    """
+    this method designs FIR hilbert transformer (ideal response with hamming window)
+    :param numtaps: filter length (odd), output is delayed by <numtaps // 2> samples
+    :return: filter taps
+    """
+    n = np.arange(numtaps) - numtaps // 2
+    taps = np.zeros(numtaps)
+    odd = n % 2 == 1
+    taps[odd] = 2 / (np.pi * n[odd])
+    return taps * np.hamming(numtaps)
+
+
+def envelope_causal(samples, numtaps=129, history=None):
+    """
+    this method computes envelope of one block of a stream with FIR hilbert transformer,
+    blocks overlap by <numtaps - 1> samples so envelope is continuous between them
+    (envelope is delayed by <numtaps // 2> samples)
+    :param history: last <numtaps - 1> samples of previous block (None for start of the stream)
+    :return: envelope of block and history for next block
+    """
+    taps = hilbert_taps(numtaps)
+    if history is None:
+        history = np.zeros(numtaps - 1)
+    extended = np.concatenate((history, samples))
+    quadrature = signal.convolve(extended, taps, mode='valid')
+    in_phase = extended[numtaps // 2:numtaps // 2 + len(samples)]
+    return np.hypot(in_phase, quadrature), extended[len(extended) - (numtaps - 1):]
@@ -0,0 +1,273 @@
+from scipy import signal
+import numpy as np
+
+from modem.checksum import crc8
+from modem.fec import fec_code, NoCode
+from modem.interleaving import interleave, deinterleave, interleaving_depth, block_bytes, block_votes, block_end
+from modem.profiling import Profiler
+
+SYNC_SLIP = 8
+SYNC_ERRORS = 2
+
+
+def bits_to_data(bits, comm_config, logger, profiler=None):
+    """
+    this method finds packets (<start byte> <data> [crc] <stop byte>) in demodulated bits with frame synchronization
+    and extracts data from them, packet at the end of the stream is kept when at least half of it was received
+    (bodies of packets are deinterleaved and data and crc of every packet are decoded with forward error correction
+    selected in config, interleaving blocks are found from block bytes of received packets)
+    :param bits: array of demodulated bits
+    :param comm_config: communication config (packet length, crc, fec, interleaving, start and stop byte)
+    :param logger: logger used to report crc errors and lost packets
+    :param profiler: profiler which measures framing, interleaving, fec and crc stages (optional)
+    :return: data with trailing null padding removed and crc check result
+    """
+    profiler = profiler or Profiler()
+    packet_len = comm_config["packet_len[bytes]"]
+    use_crc = comm_config["crc8_sum"]
+    bytes_per_packet = packet_size(comm_config)
+    bits = np.asarray(bits, dtype=np.uint8)
+
+    with profiler.stage("framing"):
+        starts, lost = find_frames(bits, bytes_per_packet, comm_config["start_byte"], comm_config["stop_byte"])
+        packets = frames_to_packets(bits, starts, bytes_per_packet)
+    with profiler.stage("interleaving"):
+        # slipped bits move packet starts by few bits only, so index of every packet is its distance in packets
+        indexes = np.rint((starts - starts[0]) / (bytes_per_packet * 8)).astype(np.int64) if len(starts) else starts
+        packets = deinterleave_packets(packets, indexes, comm_config)
+    with profiler.stage("fec"):
+        packets = decode_packets(packets, comm_config, logger)
+
+    data = bytearray(packets[:, 1:packet_len + 1].tobytes())
+    with profiler.stage("crc"):
+        crc_check = bool(np.all(check_packets_crc(packets, packet_len, logger))) if use_crc else True
+    if lost:
+        logger.error(f"frame synchronization lost {lost} packets!")
+        crc_check = False
+    if not len(starts):
+        logger.error("frame synchronization found no packet!")
+        crc_check = False
+
+    return data.rstrip(b'\x00'), crc_check
+
+
+def packet_size(comm_config):
+    """
+    this method returns length of packet on air (start and stop byte with encoded data and crc,
+    block byte when packets are interleaved)
+    :param comm_config: communication config (packet length, crc, fec, interleaving)
+    :return: amount of bytes of one packet
+    """
+    body_len = comm_config["packet_len[bytes]"] + (1 if comm_config["crc8_sum"] else 0)
+    return fec_code(comm_config).coded_length(body_len) + (3 if interleaving_depth(comm_config) > 1 else 2)
+
+
+def data_to_packets(data, comm_config):
+    """
+    this method frames data into packets (<start byte> <data> [crc] <stop byte>) at once,
+    data is reshaped into data columns of packet matrix (last packet is padded with null bytes),
+    start byte, crc and stop byte columns are filled for all packets in one operation,
+    data and crc of all packets are then encoded with forward error correction selected in config
+    and bits of encoded bodies are interleaved across packets (block byte after start byte tells receiver
+    position of the packet in its interleaving block)
+    :param data: bytes of data
+    :param comm_config: communication config (packet length, crc, fec, interleaving, start and stop byte)
+    :return: 2d uint8 matrix with one packet per row
+    """
+    packet_len = comm_config["packet_len[bytes]"]
+    use_crc = comm_config["crc8_sum"]
+    code = fec_code(comm_config)
+    body_len = packet_len + (1 if use_crc else 0)
+    data = np.frombuffer(data, dtype=np.uint8)
+
+    packets = np.zeros((-(-len(data) // packet_len), code.coded_length(body_len) + 2), dtype=np.uint8)
+    payload = packets[:, 1:packet_len + 1]
+    full = len(data) // packet_len
+    payload[:full] = data[:full * packet_len].reshape(full, packet_len)
+    payload[full:, :len(data) - full * packet_len] = data[full * packet_len:]
+
+    packets[:, 0] = comm_config["start_byte"]
+    if use_crc:
+        packets[:, packet_len + 1] = crc8(payload)
+    packets[:, -1] = comm_config["stop_byte"]
+    if not isinstance(code, NoCode):
+        packets[:, 1:-1] = code.encode(packets[:, 1:body_len + 1])
+    depth = interleaving_depth(comm_config)
+    if depth > 1:
+        packets[:, 1:-1] = interleave(packets[:, 1:-1], depth)
+        packets = np.insert(packets, 1, block_bytes(len(packets), depth), axis=1)
+    return packets
+
+
+def deinterleave_packets(packets, indexes, comm_config, offset=None, end=None):
+    """
+    this method restores order of bits of received packet bodies interleaved across packets,
+    packets are placed in interleaving blocks by block bytes (every packet votes, so lost first packets
+    or a corrupted block byte do not shift blocks), lost packets are filled with zeros
+    (their bits are errors for forward error correction of other packets)
+    :param packets: 2d uint8 matrix of received packets (<start byte> <block byte> <body> <stop byte>)
+    in order of <indexes>
+    :param indexes: index of every packet (distance in packets from any received packet)
+    :param comm_config: communication config (interleaving depth)
+    :param offset: offset of blocks against <indexes> (voted by given packets when not given)
+    :param end: position after the last sent packet (from block bytes of the last block when not given)
+    :return: 2d uint8 matrix of packets (<start byte> <body> <stop byte>) with deinterleaved bodies
+    (lost packets are not returned)
+    """
+    depth = interleaving_depth(comm_config)
+    if depth <= 1:
+        return packets
+    if not len(packets):
+        return np.delete(packets, 1, axis=1)
+    if offset is None:
+        offset = int(np.argmax(block_votes(packets[:, 1], indexes, depth)))
+    positions = np.asarray(indexes, dtype=np.int64) + offset
+    if end is None:
+        end = block_end(packets[:, 1], positions, depth)
+    first = int(positions[0]) // depth * depth
+    received = np.zeros((end - first, packets.shape[1] - 1), dtype=np.uint8)
+    received[positions - first] = np.delete(packets, 1, axis=1)
+    received[:, 1:-1] = deinterleave(received[:, 1:-1], depth)
+    return received[positions - first]
+
+
+def decode_packets(packets, comm_config, logger, first_packet=0):
+    """
+    this method decodes data and crc of received packets with forward error correction selected in config
+    :param packets: 2d uint8 matrix of received packets (<start byte> <encoded data and crc> <stop byte>)
+    :param comm_config: communication config (packet length, crc, fec)
+    :param logger: logger used to report corrected and uncorrectable packets
+    :param first_packet: index of the first given packet in the whole transmission (used in logs)
+    :return: 2d uint8 matrix of packets with decoded data and crc (<start byte> <data> [crc] <stop byte>)
+    """
+    code = fec_code(comm_config)
+    if isinstance(code, NoCode):
+        return packets
+    body_len = comm_config["packet_len[bytes]"] + (1 if comm_config["crc8_sum"] else 0)
+    bodies, corrected = code.decode(packets[:, 1:-1], body_len)
+
+    for packet_n in np.flatnonzero(corrected < 0):
+        logger.error(f"forward error correction failed for packet '{first_packet + packet_n}'!")
+    if np.any(corrected > 0):
+        logger.warning(f"forward error correction fixed {int(np.sum(corrected[corrected > 0]))} errors "
+                       f"in {int(np.sum(corrected > 0))} packets")
+    return np.hstack((packets[:, :1], bodies, packets[:, -1:]))
+
+
+def frame_pattern(bytes_per_packet, start_byte, stop_byte):
+    """
+    this method builds bipolar pattern of known bits of a packet (start and stop byte),
+    bits of data and crc are unknown and are left as 0
+    """
+    pattern = np.zeros(bytes_per_packet * 8)
+    pattern[:8] = 2.0 * np.unpackbits(np.uint8(start_byte)) - 1
+    pattern[-8:] = 2.0 * np.unpackbits(np.uint8(stop_byte)) - 1
+    return pattern
+
+
+def find_frames(bits, bytes_per_packet, start_byte, stop_byte, expected=None, final=True):
+    """
+    this method finds starts of packets by cross-correlation of bits with start and stop byte pattern,
+    packets are expected one after another, but every packet is searched within <SYNC_SLIP> bits around
+    expected position, so slipped bit costs only packet it happened in,
+    when no packet is found there synchronization is acquired again further in the stream
+    (every bit error of start or stop byte lowers correlation by 2, <SYNC_ERRORS> errors are accepted)
+    :param bits: array of demodulated bits
+    :param bytes_per_packet: length of one packet (with start, stop and crc bytes)
+    :param expected: bit index where next packet is expected (None when synchronization has to be acquired)
+    :param final: True when there are no more bits, packet at the end is found when at least half of it was received
+    :return: array of bit indexes of packet starts and amount of packets lost between them
+    """
+    bits_per_packet = bytes_per_packet * 8
+    pattern = frame_pattern(bytes_per_packet, start_byte, stop_byte)
+    perfect = int(np.sum(np.abs(pattern)))
+    threshold = perfect - 2 * SYNC_ERRORS
+
+    last_start = len(bits) - (bits_per_packet // 2 if final else bits_per_packet)
+    if last_start < 0:
+        return np.zeros(0, dtype=np.int64), 0
+    # missing end of the last packet is filled with zeros (trailing zeros of stop byte merge with silence)
+    bipolar = np.full(last_start + bits_per_packet, -1.0)
+    bipolar[:len(bits)] = 2.0 * np.asarray(bits[:len(bipolar)], dtype=np.float64) - 1
+    scores = np.rint(signal.correlate(bipolar, pattern, mode='valid')).astype(np.int64)
+    found = scores >= threshold
+    # packet is acquired only when next packet (or end of the stream) confirms it
+    following = np.full(len(found), final)
+    following[:-bits_per_packet] = found[bits_per_packet:]
+    acquired = found & following
+
+    starts = []
+    lost = 0
+    position = expected
+    while True:
+        if position is None:
+            candidates = np.flatnonzero(acquired)
+            if not len(candidates):
+                break
+            # frame shifted by a bit can also be acquired, best of close candidates is taken
+            window = candidates[candidates <= candidates[0] + SYNC_SLIP]
+            position = int(window[np.argmax(scores[window])])
+            # bits before the first found packet are silence (zeros) unless packets were not recognized there,
+            # packet cut at the start of the stream is counted as lost too
+            ones = np.flatnonzero(bits[:position])
+            gap = position - int(ones[0]) - SYNC_SLIP if len(ones) else 0
+            lost += -(-max(0, gap) // bits_per_packet)
+        else:
+            if position > last_start:
+                break
+            # packets matching perfectly at expected positions are taken at once
+            expected = np.arange(position, last_start + 1, bits_per_packet)
+            broken = np.flatnonzero(scores[expected] != perfect)
+            amount = int(broken[0]) if len(broken) else len(expected)
+            starts.extend(expected[:amount])
+            if amount == len(expected):
+                break
+            position = int(expected[amount])
+
+            window = np.arange(max(0, position - SYNC_SLIP), min(last_start, position + SYNC_SLIP) + 1)
+            # best score wins, from equal scores the one closest to expected position
+            best = window[np.argmax(scores[window] * (2 * SYNC_SLIP + 1) - np.abs(window - position))]
+            if scores[best] < threshold:
+                # synchronization lost, packets are searched again after expected position
+                later = position + SYNC_SLIP + 1 + np.flatnonzero(acquired[position + SYNC_SLIP + 1:])
+                if not len(later):
+                    break
+                # frame shifted by a bit can also be acquired, best of close candidates is taken
+                window = later[later <= later[0] + SYNC_SLIP]
+                best = int(window[np.argmax(scores[window])])
+                lost += int(round((best - position) / bits_per_packet))
+            position = int(best)
+        starts.append(position)
+        position += bits_per_packet
+
+    return np.asarray(starts, dtype=np.int64), lost
+
+
+def frames_to_packets(bits, starts, bytes_per_packet):
+    """
+    this method cuts packets starting at <starts> out of bits and packs them into bytes
+    (missing bits at the end of the stream are zeros)
+    :return: 2d uint8 matrix with one packet per row
+    """
+    bits_per_packet = bytes_per_packet * 8
+    padded = np.zeros(max(len(bits), int(starts[-1]) + bits_per_packet if len(starts) else 0), dtype=np.uint8)
+    padded[:len(bits)] = bits
+    indexes = np.asarray(starts, dtype=np.int64)[:, None] + np.arange(bits_per_packet)
+    return np.packbits(padded[indexes], axis=1).reshape(len(starts), bytes_per_packet)
+
+
+def check_packets_crc(packets, packet_len, logger, first_packet=0):
+    """
+    this method compares crc8 of data columns of every packet with its crc column (all packets at once)
+    :param packets: 2d uint8 packet matrix (<start byte> <data> <crc> <stop byte> in every row)
+    :param packet_len: amount of data bytes in packet
+    :param logger: logger used to report crc errors
+    :param first_packet: index of the first given packet in the whole transmission (used in logs)
+    :return: boolean array, True for every packet with correct crc
+    """
+    values_crc = crc8(packets[:, 1:packet_len + 1])
+    passed = values_crc == packets[:, packet_len + 1]
+    for packet_n in np.flatnonzero(~passed):
+        logger.error(f"crc sum for packet '{first_packet + packet_n}' is incorrect! "
+                     f"received: {values_crc[packet_n]} expected: {packets[packet_n, packet_len + 1]}")
+    return passed
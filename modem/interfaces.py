@@ -1,7 +1,26 @@
 from abc import ABC, abstractmethod
+import numpy as np
 
+from modem.profiling import Profiler
 
-class Modulator(ABC):
+
+class Profiled:
+    @property
+    def profiler(self) -> Profiler:
+        """
+        profiler of pipeline stages, hubs set their own one,
+        otherwise it is created on first use (implementations do not call base constructor)
+        """
+        if "_profiler" not in self.__dict__:
+            self._profiler = Profiler()
+        return self._profiler
+
+    @profiler.setter
+    def profiler(self, profiler: Profiler):
+        self._profiler = profiler
+
+
+class Modulator(Profiled, ABC):
     @abstractmethod
     def __init__(self, logger, config):
         pass
@@ -10,8 +29,31 @@ class Modulator(ABC):
     def modulate(self, input_binary):
         pass
 
+    def modulate_stream(self, input_binary, block_size=4096):
+        """
+        this method yields modulated samples in blocks of <block_size> samples (last block can be shorter)
+        modulators which can work in constant memory should override it,
+        default implementation modulates whole signal at once and slices it
+        :param input_binary: binary data to modulate
+        :param block_size: amount of samples in every yielded block
+        :return: generator of sample blocks
+        """
+        times, samples, sample_rate, modulator = self.modulate(input_binary)
+        for i in range(0, len(samples), block_size):
+            yield samples[i:i + block_size]
+
+    def modulate_many(self, input_binaries):
+        """
+        this method modulates many payloads with one configured modulator
+        modulators which can modulate many payloads in one vectorized pass should override it,
+        default implementation modulates payloads one by one
+        :param input_binaries: list of binary data to modulate
+        :return: list of modulate() results, in order of payloads
+        """
+        return [self.modulate(input_binary) for input_binary in input_binaries]
+
 
-class Demodulator(ABC):
+class Demodulator(Profiled, ABC):
     @abstractmethod
     def __init__(self, logger, config):
         pass
@@ -20,3 +62,63 @@ class Demodulator(ABC):
     def demodulate(self, input_samples):
         pass
 
+    def demodulate_stream(self, audio_stream):
+        """
+        this method yields decoded packets while audio blocks are read
+        demodulators which can work in constant memory should override it,
+        default implementation gathers whole recording and yields all data as one packet
+        :param audio_stream: AudioStream with blocks of samples
+        :return: generator of DemodulatedPacket
+        """
+        from modem.utils import Audio, DemodulatedPacket
+
+        samples = np.concatenate([np.asarray(block, dtype=np.float32) for block in audio_stream.blocks] or
+                                 [np.zeros(0, dtype=np.float32)])
+        audio = Audio(samples, audio_stream.sample_rate, len(samples), len(samples) / audio_stream.sample_rate)
+        demodulated_data = self.demodulate(audio)
+        yield DemodulatedPacket(0, demodulated_data.demodulated_data, demodulated_data.crc_check_pass)
+
+    def demodulate_bits(self, audio):
+        """
+        this method decides bits of a part of recording which does not have to contain start of the transmission,
+        so long transmission can be demodulated in parts and framed after bits of the parts are merged
+        demodulators which recover symbol timing from any part of the signal should override it,
+        default implementation returns None and such demodulators get whole transmissions
+        :param audio: part of recording
+        :return: digital samples and bits analysis with one sector per bit (None when not supported)
+        """
+        return None
+
+    def demodulate_channels(self, audio, carriers):
+        """
+        this method demodulates many transmissions sent at once on different carrier frequencies
+        demodulators which can split frequency division multiplex in one pass should override it,
+        default implementation band-passes the recording around every carrier (band is as wide as carrier spacing)
+        and demodulates channels one by one, carrier frequency from config is replaced by carrier of the channel
+        :param audio: recording with all channels
+        :param carriers: carrier frequencies of the channels in Hz
+        :return: list of DemodulatedData, in order of carriers
+        """
+        from modem.filters import band_pass
+        from modem.utils import Audio
+
+        samples = np.asarray(audio.getSamples(), dtype=np.float64)
+        sample_rate = audio.getSampleRate()
+        spacing = np.min(np.diff(np.sort(carriers))) if len(carriers) > 1 else np.inf
+        offset = max(1, int(min(spacing, min(carriers)) / 2))
+        tunable = "carrier_frequency[Hz]" in self.config
+        if not tunable:
+            self.logger.warning(f"{self.__class__.__name__} has no carrier frequency in config, "
+                                f"every channel is only band-passed and demodulated with configured frequencies")
+
+        demodulated = []
+        for carrier in carriers:
+            self.logger.debug(f"decoding channel at {int(carrier)}Hz")
+            with self.profiler.stage("filtering"):
+                channel = band_pass(samples, carrier, sample_rate, offset=offset)
+            config = {**self.config, "carrier_frequency[Hz]": carrier} if tunable else self.config
+            demodulator = type(self)(self.logger, config, self.comm_config)
+            demodulator.profiler = self.profiler
+            demodulated.append(demodulator.demodulate(Audio(channel, sample_rate, len(channel),
+                                                            len(channel) / sample_rate)))
+        return demodulated
@@ -0,0 +1,99 @@
+import numpy as np
+
+MAX_DEPTH = 16  # position in block and block length share one block byte
+
+
+def interleaving_permutation(rows, bits, depth):
+    """
+    this method builds block interleaver as permutation of bits of <rows> packet bodies,
+    every <depth> consecutive bodies form a block (last block can be shorter) which is sent column by column,
+    so consecutive bits on air belong to different packets
+    :param rows: amount of packet bodies
+    :param bits: amount of bits of one body
+    :param depth: amount of bodies in one block
+    :return: index array, bit k on air is bit <permutation[k]> of flattened bodies
+    """
+    index = np.arange(rows * bits)
+    first_row = index // (depth * bits) * depth
+    block_rows = np.minimum(depth, rows - first_row)
+    position = index - first_row * bits  # position of the bit in its block on air
+    return (first_row + position % block_rows) * bits + position // block_rows
+
+
+def interleave(bodies, depth):
+    """
+    this method interleaves bits of packet bodies in blocks of <depth> bodies
+    :param bodies: 2d uint8 matrix with one packet body per row
+    :param depth: amount of bodies in one block (1 leaves bodies unchanged)
+    :return: 2d uint8 matrix of interleaved bodies
+    """
+    bits = np.unpackbits(np.asarray(bodies, dtype=np.uint8), axis=1)
+    permutation = interleaving_permutation(bits.shape[0], bits.shape[1], depth)
+    return np.packbits(bits.reshape(-1)[permutation].reshape(bits.shape), axis=1)
+
+
+def deinterleave(bodies, depth):
+    """
+    this method restores order of bits of packet bodies interleaved by interleave()
+    :param bodies: 2d uint8 matrix with one received packet body per row
+    :param depth: amount of bodies in one block
+    :return: 2d uint8 matrix of bodies in original order
+    """
+    bits = np.unpackbits(np.asarray(bodies, dtype=np.uint8), axis=1)
+    permutation = interleaving_permutation(bits.shape[0], bits.shape[1], depth)
+    restored = np.empty(bits.size, dtype=np.uint8)
+    restored[permutation] = bits.reshape(-1)
+    return np.packbits(restored.reshape(bits.shape), axis=1)
+
+
+def interleaving_depth(comm_config):
+    """
+    this method returns interleaving depth selected in communication config ("interleaving_depth[packets]")
+    :param comm_config: communication config
+    :return: amount of packets in one interleaving block (1 when interleaving is disabled)
+    """
+    depth = comm_config.get("interleaving_depth[packets]", 1)
+    if not 1 <= depth <= MAX_DEPTH:
+        raise ValueError(f"interleaving depth has to be between 1 and {MAX_DEPTH} packets, not {depth}")
+    return depth
+
+
+def block_bytes(rows, depth):
+    """
+    this method builds block byte of every packet, high 4 bits hold position of the packet in its interleaving block
+    and low 4 bits hold length of the block minus one, so receiver finds blocks even when their first packets are lost
+    :param rows: amount of packets
+    :param depth: amount of packets in one block
+    :return: uint8 array of block bytes
+    """
+    index = np.arange(rows)
+    first_row = index // depth * depth
+    return ((index - first_row) << 4 | (np.minimum(depth, rows - first_row) - 1)).astype(np.uint8)
+
+
+def block_votes(received_bytes, indexes, depth):
+    """
+    this method counts votes of received packets for offset of interleaving blocks against packet indexes,
+    one corrupted block byte can not move packets into wrong block when other packets of the transmission agree
+    :param received_bytes: block bytes of received packets
+    :param indexes: index of every received packet (distance in packets from any received packet)
+    :param depth: amount of packets in one block
+    :return: array of <depth> vote counts, index + offset of a packet is its position counted from a block start
+    """
+    positions = np.asarray(received_bytes, dtype=np.int64) >> 4
+    return np.bincount((positions - np.asarray(indexes, dtype=np.int64)) % depth, minlength=depth)
+
+
+def block_end(received_bytes, positions, depth):
+    """
+    this method finds end of the transmission from block length written in block bytes of packets of the last block
+    :param received_bytes: block bytes of received packets
+    :param positions: ascending positions of received packets counted from a block start
+    :param depth: amount of packets in one block
+    :return: position after the last sent packet
+    """
+    start = int(positions[-1]) // depth * depth
+    lengths = (np.asarray(received_bytes, dtype=np.int64)[positions >= start] & 0x0F) + 1
+    length = min(depth, int(np.argmax(np.bincount(lengths))))
+    # the last received packet is never outside of the transmission
+    return start + max(length, int(positions[-1]) - start + 1)
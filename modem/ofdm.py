@@ -0,0 +1,80 @@
+import numpy as np
+
+from modem.psk import constellation
+
+PILOT_SYMBOL = 0
+
+
+def layout(config):
+    """
+    this method returns fft bins used by the transmission and mask of pilot subcarriers
+    (every <pilot_spacing> subcarrier and the last one are pilots, so pilot phases span whole band)
+    """
+    used = config["first_subcarrier"] + np.arange(config["subcarriers"])
+    pilots = np.zeros(len(used), dtype=bool)
+    pilots[::config["pilot_spacing"]] = True
+    pilots[-1] = True
+    return used, pilots
+
+
+def bits_per_symbol(config):
+    used, pilots = layout(config)
+    return 2 * int(np.count_nonzero(~pilots))
+
+
+def training_symbol(config):
+    """
+    this method returns known pseudo random QPSK symbol sent before data, used for synchronization
+    and channel estimation
+    """
+    generator = np.random.default_rng(config["training_seed"])
+    return np.exp(1j * constellation(4)[generator.integers(0, 4, config["subcarriers"])])
+
+
+def symbols_to_samples(grid, used, fft_size, cyclic_prefix):
+    """
+    this method turns grid of subcarrier values into real signal with one inverse fft per symbol
+    :param grid: complex array of shape (symbols, used subcarriers)
+    :return: samples of all symbols, every symbol is preceded by its cyclic prefix
+    """
+    spectrum = np.zeros((len(grid), fft_size // 2 + 1), dtype=np.complex128)
+    spectrum[:, used] = grid
+    bodies = np.fft.irfft(spectrum, n=fft_size, axis=1)
+    return np.concatenate((bodies[:, fft_size - cyclic_prefix:], bodies), axis=1).ravel()
+
+
+def samples_to_symbols(samples, first_sample, symbols_amount, used, fft_size, cyclic_prefix):
+    """
+    this method gathers fft windows of all symbols (cyclic prefixes skipped) and transforms them at once
+    :param first_sample: first sample of cyclic prefix of the first symbol
+    :return: complex array of shape (symbols, used subcarriers)
+    """
+    starts = first_sample + np.arange(symbols_amount) * (fft_size + cyclic_prefix) + cyclic_prefix
+    windows = samples[starts[:, None] + np.arange(fft_size)[None, :]]
+    return np.fft.rfft(windows, axis=1)[:, used]
+
+
+def scramble(grid, training):
+    """
+    this method rotates every subcarrier of data symbols by phase of training symbol on that subcarrier,
+    repetitive data (padding, pilots) would otherwise add up in phase and raise peak to average power ratio
+    :param grid: complex array of shape (symbols, used subcarriers)
+    """
+    return grid * training[None, :]
+
+
+def equalize(received, received_training, pilots):
+    """
+    this method equalizes every subcarrier with channel estimated from training symbol (which also undoes scrambling),
+    residual phase of every symbol (common phase error and timing drift) is fitted as a line over pilot subcarriers
+    :return: equalized data symbols of shape (symbols, used subcarriers)
+    """
+    equalized = received / received_training
+
+    positions = np.flatnonzero(pilots)
+    phases = np.unwrap(np.angle(equalized[:, pilots] * np.exp(-1j * constellation(4)[PILOT_SYMBOL])), axis=1)
+    centered = positions - positions.mean()
+    slopes = (phases - phases.mean(axis=1, keepdims=True)) @ centered / np.sum(centered ** 2)
+    intercepts = phases.mean(axis=1) - slopes * positions.mean()
+    correction = intercepts[:, None] + slopes[:, None] * np.arange(len(pilots))[None, :]
+    return equalized * np.exp(-1j * correction)
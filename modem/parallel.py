@@ -0,0 +1,228 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import importlib
+import logging
+import sys
+import os
+import numpy as np
+
+from modem.detection import run_lengths
+from modem.framing import bits_to_data, packet_size
+from modem.interfaces import Demodulator
+from modem.utils import Audio, DemodulatedData, data_sectors
+
+GAP_WINDOW = 0.05  # length of energy detector frame in seconds
+GAP_THRESHOLD = 0.002  # silence level between noise floor (0) and peak power (1)
+MIN_GAP = 1.0  # shortest silence in seconds where recording can be split
+PART_OVERLAP = 2  # packets demodulated by both neighbouring parts of a split transmission
+MIN_PART = 64  # fewest packets of a transmission given to one worker
+PLUGINS_PATH = f"{'/'.join(os.path.dirname(os.path.realpath(__file__)).split('/')[:-1])}/demodulators"
+
+
+def activity(samples, sample_rate):
+    """
+    this method finds frames of recording which carry signal with energy detector
+    :param samples: audio samples
+    :param sample_rate: sample rate in Hz
+    :return: frame length in samples and boolean array, True for every frame with signal
+    """
+    window = max(1, int(GAP_WINDOW * sample_rate))
+    frames = len(samples) // window
+    if not frames:
+        return window, np.zeros(0, dtype=bool)
+    power = np.mean(np.asarray(samples[:frames * window], dtype=np.float64).reshape(frames, window) ** 2, axis=1)
+    floor, peak = np.percentile(power, [1, 99])
+    return window, power > floor + GAP_THRESHOLD * (peak - floor)
+
+
+def split_segments(samples, sample_rate, min_gap=MIN_GAP):
+    """
+    this method splits recording into transmission segments,
+    segments are split in the middle of silence gaps found by energy detector, so no transmission is cut
+    :param samples: audio samples
+    :param sample_rate: sample rate in Hz
+    :param min_gap: shortest silence in seconds which can separate segments
+    :return: list of (first sample, one past last sample) tuples covering the whole recording
+    """
+    window, active = activity(samples, sample_rate)
+    frames = len(active)
+    if frames < 2:
+        return [(0, len(samples))]
+
+    starts, lengths, values = run_lengths(active.astype(np.uint8))
+
+    # silence before first and after last transmission is not a gap between transmissions
+    gaps = (values == 0) & (lengths * window >= min_gap * sample_rate) & (starts > 0) & \
+        (starts + lengths < frames)
+    middles = (starts[gaps] + lengths[gaps] // 2) * window
+    edges = np.concatenate(([0], middles, [len(samples)]))
+    return list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+
+def split_transmission(segment, active, window, packet_samples, parts, overlap=PART_OVERLAP):
+    """
+    this method splits segment with one long transmission into parts at packet boundaries counted from
+    the first frame with signal, neighbouring parts overlap by <overlap> packets, so symbol timing of every part
+    is locked before the first sample it owns
+    :param segment: first and one past last sample of the segment
+    :param active: frames with signal (see activity())
+    :param window: frame length in samples
+    :param packet_samples: duration of one packet in samples
+    :param parts: wanted amount of parts (every part owns at least <MIN_PART> packets)
+    :return: list of (first sample, one past last sample, first owned sample, one past last owned sample) tuples
+    """
+    start, stop = segment
+    frames = np.flatnonzero(active[start // window:stop // window])
+    onset = max(start, (start // window + int(frames[0])) * window) if len(frames) else start
+    packets = int((stop - onset) // packet_samples)
+    per_part = max(MIN_PART, -(-packets // parts))
+    edges = [start] + [int(round(onset + packet * packet_samples)) for packet in range(per_part, packets, per_part)] \
+        + [stop]
+    margin = int(round(overlap * packet_samples))
+    return [(max(start, first - margin), min(stop, last + margin), first, last)
+            for first, last in zip(edges[:-1], edges[1:])]
+
+
+def merge_parts(parts, results, samples_per_bit):
+    """
+    this method joins digital samples and bits of overlapping parts of one transmission,
+    every part gives samples it owns and bits after the last bit taken from previous part
+    (bits closer than half of bit to it are the same bit decided again)
+    :param parts: parts made by split_transmission()
+    :param results: results of demodulate_segment() for every part
+    :param samples_per_bit: nominal length of one bit in samples
+    :return: digital samples and bits analysis of the transmission
+    """
+    digital_samples, sectors = [], []
+    last = -np.inf
+    for n, ((first, _, owned_first, owned_stop), result) in enumerate(zip(parts, results)):
+        digital_samples.append(np.asarray(result[0])[owned_first - first:owned_stop - first])
+        bits_analysis = result[2]
+        keep = bits_analysis.center > last + samples_per_bit / 2
+        if n < len(parts) - 1:
+            keep &= bits_analysis.center < owned_stop
+        sectors.append(bits_analysis[keep])
+        if np.any(keep):
+            last = bits_analysis.center[keep][-1]
+    return np.concatenate(digital_samples), np.concatenate(sectors).view(np.recarray)
+
+
+def demodulate_parallel(audio: Audio, demodulator, workers, min_gap=MIN_GAP, restore=None):
+    """
+    this method demodulates every transmission of long recording in separate processes and merges results in order,
+    when demodulator decides bits of any part of the signal (see Demodulator.demodulate_bits), long transmissions
+    are also split at packet boundaries, their parts overlap and merged bits of the parts are framed once,
+    samples are passed to workers through shared memory instead of pickling them
+    :param audio: whole recording
+    :param demodulator: demodulator instance, its plugin and configs are used by every worker
+    :param workers: amount of worker processes
+    :param min_gap: shortest silence in seconds which can separate segments
+    :param restore: function which takes data and crc check result of one transmission and returns them restored
+    (e.g. decompressed), it is applied to every transmission before they are merged
+    :return: DemodulatedData of the whole recording
+    """
+    samples = np.asarray(audio.getSamples())
+    sample_rate = audio.getSampleRate()
+    comm_config = demodulator.comm_config
+    samples_per_bit = sample_rate / comm_config["baud_rate[bps]"]
+    with demodulator.profiler.stage("segmentation"):
+        segments = split_segments(samples, sample_rate, min_gap)
+        if type(demodulator).demodulate_bits is not Demodulator.demodulate_bits:
+            window, active = activity(samples, sample_rate)
+            packet_samples = packet_size(comm_config) * 8 * samples_per_bit
+            transmissions = [split_transmission(segment, active, window, packet_samples, workers)
+                             for segment in segments]
+        else:
+            transmissions = [[(start, stop, start, stop)] for start, stop in segments]
+    parts = [part for transmission in transmissions for part in transmission]
+    demodulator.logger.debug(f"recording split into {len(parts)} parts: {parts}")
+    if len(parts) == 1:
+        demodulated_data = demodulator.demodulate(audio)
+        if restore is not None:
+            demodulated_data.demodulated_data, demodulated_data.crc_check_pass = \
+                restore(demodulated_data.demodulated_data, demodulated_data.crc_check_pass)
+        return demodulated_data
+
+    # workers build their own demodulator from plugin name, so any start method of processes works
+    plugin = (type(demodulator).__module__, type(demodulator).__name__)
+    logger = (demodulator.logger.name, demodulator.logger.level)
+    memory = shared_memory.SharedMemory(create=True, size=max(1, samples.nbytes))
+    try:
+        np.ndarray(samples.shape, dtype=samples.dtype, buffer=memory.buf)[:] = samples
+        with ProcessPoolExecutor(max_workers=min(workers, len(parts))) as executor:
+            results = list(executor.map(demodulate_segment,
+                                        [(plugin, logger, demodulator.config, comm_config, memory.name,
+                                          samples.dtype.str, sample_rate, first, stop, len(transmission) > 1)
+                                         for transmission in transmissions for first, stop, _, _ in transmission]))
+    finally:
+        memory.close()
+        memory.unlink()
+
+    # stages measured in workers are added to stages of the caller
+    for result in results:
+        demodulator.profiler.merge(result[4])
+
+    merged = []
+    results = iter(results)
+    for transmission in transmissions:
+        transmission_results = [next(results) for _ in transmission]
+        if len(transmission) > 1:
+            digital_samples, bits_analysis = merge_parts(transmission, transmission_results, samples_per_bit)
+            data, crc_check = bits_to_data(bits_analysis.value, comm_config, demodulator.logger,
+                                           demodulator.profiler)
+        else:
+            digital_samples, data, bits_analysis, crc_check, _ = transmission_results[0]
+        if restore is not None:
+            data, crc_check = restore(data, crc_check)
+        merged.append((digital_samples, data, bits_analysis, crc_check))
+
+    return DemodulatedData(demodulator=demodulator,
+                           digital_samples=np.concatenate([result[0] for result in merged]),
+                           demodulated_data=bytearray(b"".join(result[1] for result in merged)),
+                           bits_analysis=np.concatenate([result[2] for result in merged]).view(np.recarray),
+                           audio=audio,
+                           crc_check_pass=all(result[3] for result in merged))
+
+
+def demodulate_segment(task):
+    """
+    this method demodulates one segment of recording stored in shared memory (runs in worker process),
+    segment which is a part of split transmission is only decided into bits
+    :param task: plugin module and class name, logger name and level, config, communication config,
+    name and dtype of shared memory, sample rate, first and one past last sample of the segment
+    and True when the segment is a part of split transmission
+    :return: digital samples, data, bits analysis (sample indexes of the whole recording), crc check result
+    and profile of demodulation stages (data and crc check result are None for part of transmission)
+    """
+    (module, name), (logger_name, level), config, comm_config, memory_name, dtype, sample_rate, start, stop, \
+        part = task
+
+    memory = shared_memory.SharedMemory(name=memory_name)
+    try:
+        shared = np.ndarray((stop,), dtype=dtype, buffer=memory.buf)
+        samples = shared[start:stop].copy()
+        del shared
+    finally:
+        memory.close()
+
+    if PLUGINS_PATH not in sys.path:
+        sys.path.append(PLUGINS_PATH)
+    demodulator_type = getattr(importlib.import_module(module), name)
+    logger = logging.getLogger(logger_name)
+    logger.setLevel(level)
+    if not logger.handlers:
+        # process was spawned, not forked, so handlers of the caller are not inherited
+        logger.addHandler(logging.StreamHandler(sys.stdout))
+
+    audio = Audio(samples, sample_rate, len(samples), len(samples) / sample_rate)
+    demodulator = demodulator_type(logger, config, comm_config)
+    if part:
+        digital_samples, sectors = demodulator.demodulate_bits(audio)
+        data = crc_check = None
+    else:
+        demodulated = demodulator.demodulate(audio)
+        digital_samples, sectors = demodulated.digital_samples, demodulated.bits_analysis
+        data, crc_check = bytes(demodulated.demodulated_data), demodulated.crc_check_pass
+
+    bits_analysis = data_sectors(sectors.left_edge + start, sectors.right_edge + start, sectors.value)
+    return np.asarray(digital_samples), data, bits_analysis, crc_check, demodulator.profiler.report()
@@ -1,15 +1,20 @@
 from matplotlib.ticker import FormatStrFormatter
+from typing import Union, List, Iterator
 from matplotlib import pyplot as plt
-from crc import Calculator, Crc8
 import sounddevice as sd
+from functools import partial
 import numpy as np
-import struct
 import copy
 import wave
 import os
 
+from modem.compression import compress_payload, decompress_payload, decompressor, decompress_chunk, STREAM_END
 from modem.interfaces import Modulator, Demodulator
-from modem.utils import load_config, DemodulatedData, ModulatedData, Audio, Binary
+from modem.framing import data_to_packets
+from modem.parallel import demodulate_parallel
+from modem.profiling import Profiler
+from modem.utils import load_config, DemodulatedData, DemodulatedPacket, ModulatedData, ModulatedStream, Audio, \
+    AudioStream, Binary
 
 class HUB:
     def __init__(self, logger, processing_type):
@@ -17,6 +22,9 @@ class HUB:
         self.processing_type = processing_type
         self.dir_name = '/'.join(os.path.dirname(os.path.realpath(__file__)).split('/')[:-1])
         self.comm_config = load_config(f"{self.dir_name}/configs/communication_config.json")
+        # stages of everything processed by this hub are accumulated here,
+        # every modulation and demodulation is also profiled on its own and its stages are attached to results
+        self.profiler = Profiler()
 
     def find_processing_config(self, processing_mode):
         self.dir_name = '/'.join(os.path.dirname(os.path.realpath(__file__)).split('/')[:-1])
@@ -100,71 +108,97 @@ class ModulatorHub(HUB):
         self.logger.debug("pre modulation init")
         config = self.find_processing_config(modulator_type.__name__)
         modulator = modulator_type(self.logger, config, self.comm_config)
-        times, samples, sample_rate, class_name = modulator.modulate(input_binary)
-        return ModulatedData(class_name, config, times, samples, sample_rate, input_binary)
+        profiler = modulator.profiler = Profiler(parent=self.profiler)
+        with profiler.stage("modulation"):
+            times, samples, sample_rate, class_name = modulator.modulate(input_binary)
+        return ModulatedData(class_name, config, times, samples, sample_rate, input_binary, profiler.report())
+
+    def modulate_many(self, input_binaries: List[Binary], modulator_type: type(Modulator), concatenate=False):
+        """
+        this method modulates many payloads with one modulator (config is loaded and modulator is built once)
+        :param input_binaries: list of binary data to modulate
+        :param modulator_type: modulator class
+        :param concatenate: return one waveform with all payloads one after another instead of list of waveforms
+        :return: list of ModulatedData (one per payload) or single ModulatedData when concatenated
+        """
+        self.logger.debug("pre batch modulation init")
+        config = self.find_processing_config(modulator_type.__name__)
+        modulator = modulator_type(self.logger, config, self.comm_config)
+        profiler = modulator.profiler = Profiler(parent=self.profiler)
+        with profiler.stage("modulation"):
+            results = modulator.modulate_many(input_binaries)
+
+        if not concatenate:
+            profile = profiler.report()
+            return [ModulatedData(class_name, config, times, samples, sample_rate, input_binary, profile)
+                    for (times, samples, sample_rate, class_name), input_binary in zip(results, input_binaries)]
+
+        sample_rate = config["sample_rate[Hz]"]
+        samples = np.concatenate([samples for _, samples, _, _ in results]) if results else np.zeros(0)
+        times = np.arange(len(samples)) / sample_rate
+        data = Binary(bytearray(b"".join(input_binary.getByteArray() for input_binary in input_binaries)))
+        return ModulatedData(modulator, config, times, samples, sample_rate, data, profiler.report())
+
+    def modulate_stream(self, input_binary: Binary, modulator_type: type(Modulator), block_size=4096):
+        self.logger.debug("pre stream modulation init")
+        config = self.find_processing_config(modulator_type.__name__)
+        modulator = modulator_type(self.logger, config, self.comm_config)
+        modulator.profiler = self.profiler
+        blocks = modulator.modulate_stream(input_binary, block_size)
+        return ModulatedStream(modulator, config, blocks, config["sample_rate[Hz]"], input_binary)
 
-    def play(self, modulated_data: ModulatedData):
-        if len(modulated_data.samples) == 0:
+    def play(self, modulated_data: Union[ModulatedData, ModulatedStream]):
+        if isinstance(modulated_data, ModulatedData) and len(modulated_data.samples) == 0:
             self.logger.error("samples cannot be empty")
             return
 
         self.logger.info("playing modulated data start")
         print("play start")
-        sd.play(modulated_data.samples, modulated_data.sample_rate, blocking=True)
+        if isinstance(modulated_data, ModulatedStream):
+            with sd.OutputStream(samplerate=modulated_data.sample_rate, channels=1, dtype='float32') as stream:
+                for block in modulated_data.blocks:
+                    stream.write(np.asarray(block, dtype=np.float32).reshape(-1, 1))
+        else:
+            sd.play(modulated_data.samples, modulated_data.sample_rate, blocking=True)
         print("play end")
         self.logger.info("playing modulated data end")
 
-    def save(self, modulated_data: ModulatedData, filepath):
+    def save(self, modulated_data: Union[ModulatedData, ModulatedStream], filepath):
         self.logger.info(f"saving modulated data to '{filepath}'")
         with wave.open(filepath, 'w') as f:
             f.setnchannels(1)
             f.setframerate(modulated_data.sample_rate)
             f.setsampwidth(2)
-            for sample in copy.copy(modulated_data.samples):
-                sample = int(sample * (2 ** 15 - 1))
-                f.writeframes(struct.pack("<h", sample))
-
-    def encode_data(self, input_binary: Binary):
-        config = self.comm_config
-
-        start_bit = config["start_byte"]
-        stop_bit = config["stop_byte"]
-        packet_len = config["packet_len[bytes]"]
-        use_crc = config["crc8_sum"]
-
-        packets = []
-
-        bytes_in_packet = 0
-        _packet = []
-        for _byte in input_binary.getByteArray():
-            _packet.append(_byte)
-            bytes_in_packet += 1
-            if bytes_in_packet == packet_len:
-                packets.append(_packet)
-                _packet = []
-                bytes_in_packet = 0
-
-        if 0 < bytes_in_packet < packet_len:
-            for i in range(packet_len - bytes_in_packet):
-                _packet.append(0)
-            packets.append(_packet)
-
-        calculator = Calculator(Crc8.CCITT)  # noqa
+            for block in self.__sample_blocks(modulated_data):
+                f.writeframes((np.asarray(block) * (2 ** 15 - 1)).astype('<i2').tobytes())
 
-        for packet in packets:
-            bin_packet = Binary(bytearray(packet)).getByteArray()
-            if use_crc:
-                crc_sum = calculator.checksum(bin_packet)
-                packet.append(crc_sum)
-            packet.insert(0, start_bit)
-            packet.append(stop_bit)
-
-        output = bytearray()
-        for packet in packets:
-            for data in packet:
-                output.append(data)
+    @staticmethod
+    def __sample_blocks(modulated_data: Union[ModulatedData, ModulatedStream], block_size=4096):
+        if isinstance(modulated_data, ModulatedStream):
+            yield from modulated_data.blocks
+        else:
+            for i in range(0, len(modulated_data.samples), block_size):
+                yield modulated_data.samples[i:i + block_size]
+
+    def compress_data(self, input_binary: Binary):
+        """
+        this method compresses payload before framing when compression is enabled in communication config,
+        method which makes payload smallest is chosen and written in one byte header
+        :param input_binary: payload
+        :return: payload with compression header (unchanged payload when compression is disabled)
+        """
+        if not self.comm_config.get("compression", False):
+            return input_binary
+        with self.profiler.stage("compression"):
+            data = input_binary.getByteArray()
+            compressed, method = compress_payload(data)
+        self.logger.debug(f"payload compressed with {method} from {len(data)} to {len(compressed)} bytes")
+        return Binary(bytearray(compressed))
 
-        return Binary(output)
+    def encode_data(self, input_binary: Binary):
+        with self.profiler.stage("encoding"):
+            packets = data_to_packets(input_binary.getByteArray(), self.comm_config)
+            return Binary(bytearray(packets.tobytes()))
 
 
 class DemodulatorHub(HUB):
@@ -191,11 +225,14 @@ class DemodulatorHub(HUB):
         plot2.step([x for x in range(len(demodulated_data.digital_samples))], demodulated_data.digital_samples, color="black")
         plot2.fill_between([x for x in range(len(demodulated_data.digital_samples))], demodulated_data.digital_samples,
                            step="pre", alpha=1, color='black')
-        for point in demodulated_data.bits_analysis:
-            plot2.axvspan(point.left_edge, point.right_edge, color="red" if point.value == 1 else "blue", alpha=0.3)
-            half_width = point.width/4
-            pos = point.left_edge + half_width
-            plot2.text(pos, 1.1, str(point.value), fontsize="x-small", fontstretch="extra-condensed")
+        bits_analysis = demodulated_data.bits_analysis
+        ones = bits_analysis.value == 1
+        for mask, color in ((ones, "red"), (~ones, "blue")):
+            plot2.broken_barh(list(zip(bits_analysis.left_edge[mask], bits_analysis.width[mask])), (0, height),
+                              color=color, alpha=0.3)
+        for pos, value in zip((bits_analysis.left_edge + bits_analysis.width / 4).tolist(),
+                              bits_analysis.value.tolist()):
+            plot2.text(pos, 1.1, str(value), fontsize="x-small", fontstretch="extra-condensed")
         plot2.set_ylim(ymin=0, ymax=height)
 
         # plot 3
@@ -214,15 +251,123 @@ class DemodulatorHub(HUB):
         plt.suptitle(f"{demodulated_data.demodulator.__class__.__name__} demodulation")
         plt.subplots_adjust(bottom=0.1, top=0.85, left=0.05, right=0.95)
 
-    def demodulate(self, audio: Audio, demodulator_type: type(Demodulator)):
+    def demodulate(self, audio: Audio, demodulator_type: type(Demodulator), workers=1):
         self.logger.debug("pre demodulation init")
         config = self.find_processing_config(demodulator_type.__name__)
         demodulator = demodulator_type(self.logger, config, self.comm_config)
-        return demodulator.demodulate(audio)
-
-    def save(self, demodulated_data: DemodulatedData, filepath):
+        profiler = demodulator.profiler = Profiler(parent=self.profiler)
+        with profiler.stage("demodulation"):
+            if workers > 1:
+                # recording is split at silence between transmissions, segments are demodulated in worker processes,
+                # every transmission is decompressed on its own before transmissions are merged
+                demodulated_data = demodulate_parallel(audio, demodulator, workers,
+                                                       restore=partial(self.__restore_payload, profiler=profiler))
+            else:
+                demodulated_data = demodulator.demodulate(audio)
+                demodulated_data.demodulated_data, demodulated_data.crc_check_pass = \
+                    self.__restore_payload(demodulated_data.demodulated_data, demodulated_data.crc_check_pass,
+                                           profiler)
+        demodulated_data.profile = profiler.report()
+        return demodulated_data
+
+    def demodulate_channels(self, audio: Audio, demodulator_type: type(Demodulator), carriers: List[float]):
+        self.logger.debug("pre multi-channel demodulation init")
+        config = self.find_processing_config(demodulator_type.__name__)
+        demodulator = demodulator_type(self.logger, config, self.comm_config)
+        profiler = demodulator.profiler = Profiler(parent=self.profiler)
+        with profiler.stage("demodulation"):
+            channels = demodulator.demodulate_channels(audio, carriers)
+            for demodulated_data in channels:
+                demodulated_data.demodulated_data, demodulated_data.crc_check_pass = \
+                    self.__restore_payload(demodulated_data.demodulated_data, demodulated_data.crc_check_pass,
+                                           profiler)
+        profile = profiler.report()
+        for demodulated_data in channels:
+            demodulated_data.profile = profile
+        return channels
+
+    def demodulate_stream(self, audio_stream: AudioStream, demodulator_type: type(Demodulator)):
+        self.logger.debug("pre stream demodulation init")
+        config = self.find_processing_config(demodulator_type.__name__)
+        demodulator = demodulator_type(self.logger, config, self.comm_config)
+        demodulator.profiler = self.profiler
+        return self.__decompress_stream(demodulator.demodulate_stream(audio_stream))
+
+    def __restore_payload(self, data, crc_check, profiler):
+        """
+        this method restores payload of one transmission compressed by ModulatorHub.compress_data() when compression
+        is enabled in communication config, payload which can not be decompressed fails crc check
+        :param data: demodulated payload with compression header
+        :param crc_check: crc check result of the payload
+        :param profiler: profiler of the demodulation
+        :return: decompressed payload and crc check result
+        """
+        if not self.comm_config.get("compression", False) or not crc_check:
+            return data, crc_check
+        with profiler.stage("decompression"):
+            try:
+                return bytearray(decompress_payload(data)), crc_check
+            except ValueError as error:
+                self.logger.error(f"decompression failed! {error}")
+                return data, False
+
+    def __decompress_stream(self, packets: Iterator[DemodulatedPacket]):
+        """
+        this method decompresses payload of demodulated packets on the fly when compression is enabled
+        in communication config, method is read from the first packet of every transmission (packet after the end
+        of compressed payload starts next transmission), packets after decompression error fail crc check
+        :param packets: demodulated packets with compressed payload
+        :return: generator of packets with decompressed parts of payload (part can be empty)
+        """
+        if not self.comm_config.get("compression", False):
+            yield from packets
+            return
+        method, failed, first = None, False, True
+        for packet in packets:
+            data = bytes(packet.data)
+            # packet with data after the end of compressed payload starts next transmission
+            if not first and not failed and method is not None and method.eof and \
+                    data.rstrip(b'\x00') not in (b'', bytes([STREAM_END])):
+                first = True
+            if first:
+                try:
+                    method = decompressor(data[0])
+                except ValueError as error:
+                    self.logger.error(f"decompression failed! {error}")
+                    failed = True
+                data, first = data[1:], False
+            if failed:
+                yield DemodulatedPacket(packet.index, bytearray(), False)
+                continue
+            if method is not None:
+                with self.profiler.stage("decompression"):
+                    try:
+                        data = decompress_chunk(method, data)
+                    except ValueError as error:
+                        self.logger.error(f"decompression failed at packet '{packet.index}'! {error}")
+                        failed = True
+                        data = b''
+            yield DemodulatedPacket(packet.index, bytearray(data), packet.crc_check_pass and not failed)
+        if method is not None and not method.eof and not failed:
+            self.logger.error("compressed payload is truncated")
+
+    def save(self, demodulated_data: Union[DemodulatedData, Iterator[DemodulatedPacket]], filepath):
         self.logger.info(f"saving demodulated data to '{filepath}'")
         with open(filepath, 'wb') as f:
-            f.write(demodulated_data.demodulated_data)
+            if isinstance(demodulated_data, DemodulatedData):
+                f.write(demodulated_data.demodulated_data)
+                return
+
+            # null bytes are written only when followed by data, so padding of the last packet is dropped
+            nulls = 0
+            for packet in demodulated_data:
+                if not packet.crc_check_pass:
+                    self.logger.error(f"crc check failed for packet '{packet.index}'! received data is corrupted")
+                data = bytes(packet.data)
+                stripped = data.rstrip(b'\x00')
+                if stripped:
+                    f.write(b'\x00' * nulls + stripped)
+                    nulls = 0
+                nulls += len(data) - len(stripped)
 
 
@@ -0,0 +1,78 @@
+from contextlib import contextmanager
+import tracemalloc
+import time
+
+
+class Profiler:
+    """
+    this class records wall time, cpu time and peak allocation of named pipeline stages,
+    repeated stages (stream blocks, many payloads) are accumulated and stages can be nested,
+    peak allocation is measured only while tracemalloc is tracing (it slows allocations down, so it is opt-in)
+    """
+    def __init__(self, parent=None):
+        """
+        :param parent: profiler which also records every stage of this one (e.g. total of many profiled calls)
+        """
+        self.stages = {}
+        self.__parent = parent
+        self.__peaks = []  # highest traced memory seen inside every open stage
+
+    @contextmanager
+    def stage(self, name):
+        """
+        this method measures code run inside of with block as stage <name>
+        :param name: name of the stage
+        """
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            self.__lift(peak)
+            tracemalloc.reset_peak()
+        else:
+            current = 0
+        self.__peaks.append(current)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            peak = self.__peaks.pop()
+            if tracing and tracemalloc.is_tracing():
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                self.__lift(peak)
+            self.__record(name, wall, cpu, peak - current if tracing else None)
+
+    def merge(self, report):
+        """
+        this method adds stages of report made by other profiler (e.g. in worker process)
+        :param report: result of report() of other profiler
+        """
+        for name, stage in report.items():
+            self.__record(name, stage["wall_time[s]"], stage["cpu_time[s]"], stage["peak_memory[B]"],
+                          stage["calls"])
+
+    def report(self):
+        """
+        this method returns copy of recorded stages in order of their first run
+        :return: dict of {<stage>: {"calls", "wall_time[s]", "cpu_time[s]", "peak_memory[B]"}}
+        (peak memory is None when memory was not traced)
+        """
+        return {name: dict(stage) for name, stage in self.stages.items()}
+
+    def __lift(self, peak):
+        """
+        this method passes peak of finished part of the stage to all open stages, so reset of tracemalloc peak
+        by nested stage is not lost for outer stages
+        """
+        self.__peaks = [max(value, peak) for value in self.__peaks]
+
+    def __record(self, name, wall, cpu, memory, calls=1):
+        stage = self.stages.setdefault(name, {"calls": 0, "wall_time[s]": 0.0, "cpu_time[s]": 0.0,
+                                              "peak_memory[B]": None})
+        stage["calls"] += calls
+        stage["wall_time[s]"] += wall
+        stage["cpu_time[s]"] += cpu
+        if memory is not None:
+            stage["peak_memory[B]"] = max(stage["peak_memory[B]"] or 0, memory)
+        if self.__parent is not None:
+            self.__parent.__record(name, wall, cpu, memory, calls)
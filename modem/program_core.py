@@ -1,4 +1,4 @@
-from typing import Sequence, Optional
+from typing import Sequence, Optional, Union
 from dataclasses import dataclass
 import numpy as np
 from glob import glob
@@ -10,7 +10,7 @@ import sys
 import os
 
 from modem.interfaces import Modulator, Demodulator
-from modem.utils import Binary, Audio
+from modem.utils import Binary, Audio, AudioStream
 
 
 @dataclass
@@ -19,7 +19,7 @@ class core_data:
     modulators: dict
     demodulators: dict
     args: dict
-    data: Binary
+    data: Union[Binary, Audio, AudioStream]
 
 
 class program_core:
@@ -36,7 +36,10 @@ class program_core:
         if self.__args["command"] == "modulate":
             self.__data = self.__load_data_to_bytearray(self.__args["input"])
         elif self.__args["command"] == "demodulate":
-            self.__data = self.__decode_samples_from_file(self.__args["input"])
+            if self.__args["stream"] and not (self.__args["analise"] or self.__args["show"] or self.__args["channels"]):
+                self.__data = self.__stream_samples_from_file(self.__args["input"])
+            else:
+                self.__data = self.__decode_samples_from_file(self.__args["input"])
         else:
             raise TypeError(f"program can be run either in modulate or demodulate mode! '{self.__args['command']}' is not valid")
 
@@ -170,6 +173,36 @@ class program_core:
                                      help="output type: <file/audio>",
                                      action="store_true")
 
+        modulate_parser.add_argument("--stream",
+                                     default=False,
+                                     required=False,
+                                     help="modulate in fixed size blocks with constant memory usage "
+                                          "(analysis is not available in this mode)",
+                                     action="store_true")
+
+        demodulate_parser.add_argument("--stream",
+                                       default=False,
+                                       required=False,
+                                       help="demodulate audio file in fixed size blocks with constant memory usage "
+                                            "(analysis is not available in this mode)",
+                                       action="store_true")
+
+        demodulate_parser.add_argument("--workers",
+                                       type=int,
+                                       default=1,
+                                       required=False,
+                                       help="amount of processes demodulating long recording, "
+                                            "recording is split at silence between transmissions "
+                                            "(stream mode ignores it)")
+
+        demodulate_parser.add_argument("--channels",
+                                       type=float,
+                                       nargs="+",
+                                       default=None,
+                                       required=False,
+                                       help="carrier frequencies in Hz of transmissions sent at once, "
+                                            "every channel is demodulated and saved to its own file")
+
         parser.add_argument('-r',
                             "--raw",
                             required=False,
@@ -198,6 +231,13 @@ class program_core:
                             help="will show out performed analysis",
                             action="store_true")
 
+        parser.add_argument("--profile",
+                            required=False,
+                            default=None,
+                            help="will save wall time, cpu time and peak memory of every processing stage "
+                                 "to given json path",
+                            type=str)
+
         return vars(parser.parse_args(argv))
 
     @staticmethod
@@ -223,6 +263,8 @@ class program_core:
                     continue
                 if obj == package_type:
                     continue
+                if inspect.isabstract(obj):
+                    continue
 
                 package[name] = obj
         return package
@@ -263,3 +305,18 @@ class program_core:
         audio_length = samples_amount / sample_rate
 
         return Audio(audio_normalised, sample_rate, samples_amount, audio_length)
+
+    def __stream_samples_from_file(self, filepath, block_size=2 ** 16) -> AudioStream:
+        self.__logger.info("opening audio file as stream...")
+        ifile = wave.open(filepath)
+
+        def blocks():
+            with ifile:
+                while True:
+                    audio = ifile.readframes(block_size)
+                    if not audio:
+                        break
+                    # normalise int16 samples so that values are between -1.0 and +1.0
+                    yield np.frombuffer(audio, dtype=np.int16).astype(np.float32) / 2 ** 15
+
+        return AudioStream(blocks(), ifile.getframerate())
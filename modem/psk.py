@@ -0,0 +1,118 @@
+import numpy as np
+
+# barker 13 sequence sent after preamble (+1 keeps phase of previous symbol, -1 flips it), it marks start of data,
+# preamble and start byte are runs of flips, so sync word differs from them in most symbols
+SYNC_WORD = np.array([1, 1, 1, 1, 1, -1, -1, 1, 1, -1, 1, -1, 1])
+SYNC_THRESHOLD = 0.7  # lowest correlation with sync word (1 is perfect match)
+
+
+def constellation(order):
+    """
+    this method returns phase of every constellation point of <order>-PSK
+    (BPSK: 0, pi | QPSK: pi/4, 3pi/4, 5pi/4, 7pi/4)
+    """
+    offset = np.pi / 4 if order == 4 else 0.0
+    return offset + 2 * np.pi * np.arange(order) / order
+
+
+def decide(symbols, order):
+    """
+    this method returns index of the nearest constellation point for every symbol
+    """
+    offset = constellation(order)[0]
+    return np.round((np.angle(symbols) - offset) / (2 * np.pi / order)).astype(np.int64) % order
+
+
+def phase_error(symbols, order):
+    """
+    decision directed costas error: angle between every symbol and its nearest constellation point
+    """
+    return np.angle(symbols * np.exp(-1j * constellation(order)[decide(symbols, order)]))
+
+
+def sync_increments(order):
+    """
+    this method returns phase increments (in constellation points) which send sync word
+    """
+    return np.where(SYNC_WORD > 0, 0, order // 2)
+
+
+def find_sync(symbols, search_symbols):
+    """
+    this method finds sync word in recovered symbols by correlation of phase changes between neighbouring symbols,
+    it is searched only within first <search_symbols> symbols (preamble and its neighbourhood), where no data is sent
+    before it, so the earliest full match is the sync word even when data contains the same phase changes
+    :param symbols: complex symbols after carrier phase correction
+    :param search_symbols: amount of symbols from start of the transmission where sync word is searched
+    :return: index of the last symbol of sync word (None when sync word was not found)
+    """
+    symbols = symbols[:search_symbols + 1]
+    changes = symbols[1:] * np.conj(symbols[:-1])
+    changes = np.real(changes) / np.maximum(np.abs(changes), np.finfo(np.float64).tiny)
+    if len(changes) < len(SYNC_WORD):
+        return None
+    correlation = np.correlate(changes, SYNC_WORD, mode='valid') / len(SYNC_WORD)
+    found = np.flatnonzero(correlation >= SYNC_THRESHOLD)
+    if not len(found):
+        return None
+    # frame shifted by a symbol matches only partly, best of close candidates is taken
+    window = found[found <= found[0] + 2]
+    return int(window[np.argmax(correlation[window])]) + len(SYNC_WORD)
+
+
+def recover_symbols(baseband, first_sample, symbols_amount, samples_per_symbol, order,
+                    timing_gain, phase_gain, frequency_gain, block_symbols):
+    """
+    this method samples matched filtered baseband at symbol centers and corrects carrier phase
+    both loops are updated once per block of symbols, every block is computed as vector operations:
+    - symbol timing is tracked by gardner timing error detector
+    - carrier phase and frequency are tracked by costas loop (second order)
+    :param baseband: complex, matched filtered baseband signal
+    :param first_sample: sample where first symbol starts
+    :param symbols_amount: amount of symbols to recover
+    :param samples_per_symbol: amount of samples per symbol (can be fractional)
+    :param order: amount of constellation points
+    :param timing_gain: gain of timing loop
+    :param phase_gain: proportional gain of costas loop
+    :param frequency_gain: integral gain of costas loop
+    :param block_symbols: amount of symbols processed between loop updates
+    :return: complex symbols after carrier phase correction
+    """
+    last = len(baseband) - 1
+
+    def interpolate(times):
+        times = np.clip(times, 0, last)
+        left = np.minimum(times.astype(np.int64), max(last - 1, 0))
+        fraction = times - left
+        return baseband[left] * (1 - fraction) + baseband[np.minimum(left + 1, last)] * fraction
+
+    symbols = np.empty(symbols_amount, dtype=np.complex128)
+    timing = 0.0
+    phase = None
+    frequency = 0.0
+    for first in range(0, symbols_amount, block_symbols):
+        indexes = np.arange(first, min(first + block_symbols, symbols_amount))
+        times = first_sample + (indexes + 0.5) * samples_per_symbol + timing
+
+        current = interpolate(times)
+        middle = interpolate(times - samples_per_symbol / 2)
+        previous = interpolate(times - samples_per_symbol)
+        power = np.mean(np.abs(current) ** 2) or 1.0
+
+        if phase is None:
+            # initial phase from M-th power of first block, removes data modulation from the carrier
+            offset = constellation(order)[0]
+            phase = np.angle(np.sum(current ** order) * np.exp(-1j * order * offset)) / order
+
+        rotated = current * np.exp(-1j * (phase + frequency * (indexes - first)))
+        symbols[indexes] = rotated
+
+        timing_error = np.mean(np.real((current - previous) * np.conj(middle))) / power
+        timing -= timing_gain * timing_error * samples_per_symbol
+        timing = float(np.clip(timing, -samples_per_symbol / 2, samples_per_symbol / 2))
+
+        error = np.mean(phase_error(rotated, order))
+        phase += frequency * len(indexes) + phase_gain * error
+        frequency += frequency_gain * error
+
+    return symbols
@@ -0,0 +1,135 @@
+import numpy as np
+
+from modem.detection import run_lengths
+
+TIMING_BLOCK = 16
+PROPORTIONAL_GAIN = 0.5
+INTEGRAL_GAIN = 0.3
+
+
+def integrate(summed, positions):
+    """
+    this method evaluates integral of samples from 0 to fractional <positions>
+    (sample i covers interval [i, i + 1), positions outside of samples are clipped)
+    :param summed: cumulative sum of samples with leading zero
+    :param positions: array of fractional positions
+    :return: array of integrals
+    """
+    positions = np.minimum(np.maximum(positions, 0), len(summed) - 1)
+    whole = np.minimum(positions.astype(np.int64), len(summed) - 2)
+    return summed[whole] + (positions - whole) * (summed[whole + 1] - summed[whole])
+
+
+class SymbolTiming:
+    """
+    this class recovers symbol clock of binary baseband signal (positive samples for '1', negative for '0'),
+    symbols are decided by integrate-and-dump over one symbol period and timing is tracked with gardner detector
+    (integral over window centered between neighbouring symbols of different value is zero when symbols are aligned),
+    timing error is averaged over blocks of <block_symbols> symbols, so the loop is vectorized per block,
+    proportional term corrects phase of the block and integral term corrects symbol period (clock drift),
+    first symbol starts at first rising edge of averaged signal which lasts at least half of symbol
+    """
+    def __init__(self, samples_per_symbol, block_symbols=TIMING_BLOCK, proportional_gain=PROPORTIONAL_GAIN,
+                 integral_gain=INTEGRAL_GAIN):
+        self.period = float(samples_per_symbol)
+        self.block_symbols = block_symbols
+        self.proportional_gain = proportional_gain
+        self.integral_gain = integral_gain
+        self.__buffer = np.zeros(0)
+        self.__offset = 0  # index of first buffered sample in the whole signal
+        self.__next = None  # position of next symbol center in the whole signal
+        self.__previous = None  # integral of last symbol of previous block
+        self.__window_edges = np.array([-1, -0.5, 0, 0.5])[:, None]
+
+    def update(self, samples, final=False):
+        """
+        this method decides symbols of every complete block of symbols which fits into samples received so far
+        :param samples: next block of the signal
+        :param final: True for the last samples of the signal, symbols of incomplete block are decided too
+        :return: centers of decided symbols (positions in the whole signal) and their integrals
+        """
+        self.__buffer = np.concatenate((self.__buffer, np.asarray(samples, dtype=np.float64)))
+        if self.__next is None and not self.__acquire():
+            return np.zeros(0), np.zeros(0)
+
+        summed = np.concatenate(([0.0], np.cumsum(self.__buffer)))
+        end = self.__offset + len(self.__buffer)
+        symbols = np.arange(self.block_symbols)
+        centers = []
+        while True:
+            positions = self.__next + self.period * symbols
+            positions = positions[positions + self.period / 2 <= end]
+            if not len(positions) or len(positions) < self.block_symbols and not final:
+                break
+
+            if len(positions) == self.block_symbols:
+                # few symbols at the end of the signal are decided with timing of previous block
+                error = self.__timing_error(summed, positions - self.__offset)
+                positions -= self.proportional_gain * error
+                self.period -= self.integral_gain * error / self.block_symbols
+            centers.append(positions)
+            self.__next = positions[-1] + self.period
+
+        # samples before previous symbol are not needed anymore
+        offset = self.__offset
+        keep = max(0, min(len(self.__buffer), int(self.__next - 2 * self.period) - self.__offset))
+        self.__buffer = self.__buffer[keep:]
+        self.__offset += keep
+
+        if not centers:
+            return np.zeros(0), np.zeros(0)
+        centers = np.concatenate(centers)
+        return centers, self.__integrals(summed, centers - offset)
+
+    def __acquire(self):
+        """
+        this method looks for the first symbol, samples before it are dropped
+        :return: True when the first symbol was found
+        """
+        # noise splits runs of raw samples, so edge is searched in signal averaged over quarter of symbol
+        # (signal is extended with its edge samples, so short silence at the start is not averaged out)
+        window = max(1, int(self.period / 4))
+        summed = np.cumsum(np.pad(self.__buffer, (window // 2 + 1, window - window // 2 - 1), mode='edge'))
+        smoothed = summed[window:] - summed[:-window]
+        starts, lengths, values = run_lengths((smoothed > 0).astype(np.uint8))
+        # positive run has to be preceded by a negative sample, short runs are treated as noise
+        candidates = (values == 1) & (starts + self.__offset > 0)
+        found = np.flatnonzero(candidates & (lengths >= self.period / 2))
+        if not len(found):
+            # run still open at the end of buffer may become long enough with next samples
+            opened = len(values) and candidates[-1]
+            keep = max(0, starts[-1] - 1 if opened else len(self.__buffer) - 1)
+            self.__buffer = self.__buffer[keep:]
+            self.__offset += keep
+            return False
+
+        self.__next = self.__offset + starts[found[0]] + self.period / 2
+        return True
+
+    def __integrals(self, summed, positions):
+        """
+        this method integrates signal over symbol periods centered at <positions>
+        """
+        half = self.period / 2
+        edges = integrate(summed, np.concatenate((positions - half, positions + half)))
+        return (edges[len(positions):] - edges[:len(positions)]) / self.period
+
+    def __timing_error(self, summed, positions):
+        """
+        this method estimates how late are symbol centers (in samples) using gardner detector on integrals,
+        for rectangular symbols the estimate is linear in range of +-half of symbol
+        """
+        # integrals over symbols and over windows centered between previous and current symbol
+        edges = integrate(summed, positions + self.__window_edges * self.period).reshape(4, -1) / self.period
+        values = edges[3] - edges[1]
+        between = edges[2] - edges[0]
+        previous = np.concatenate(([values[0] if self.__previous is None else self.__previous], values[:-1]))
+        # only changes of decided symbol carry timing information, noise of other symbols is left out
+        changes = np.where((values > 0) != (previous > 0), values - previous, 0)
+        self.__previous = values[-1]
+        power = np.dot(changes, changes)
+        if power <= 0:
+            return 0.0
+        # transition between levels -a and a gives change 2a and between integral 2a * error / period
+        error = self.period * np.dot(changes, between) / power
+        return min(max(error, -self.period / 2), self.period / 2)
@@ -1,5 +1,6 @@
-from typing import List
-from dataclasses import dataclass
+from typing import List, Iterator
+from dataclasses import dataclass, field
+import numpy as np
 import json
 
 from modem.interfaces import Modulator, Demodulator
@@ -8,16 +9,20 @@ from modem.interfaces import Modulator, Demodulator
 class Binary:
     def __init__(self, input_bin: bytearray):
         self.__input_bin = input_bin
-        self.__bin = self.__to_bin()
-        self.__str = self.__to_str()
+        self.__bin = None
+        self.__str = None
 
     def getSize(self):
-        return len(self.__bin)
+        return len(self.__input_bin) * 8
 
     def getStr(self):
+        if self.__str is None:
+            self.__str = self.__to_str()
         return self.__str
 
     def getBin(self):
+        if self.__bin is None:
+            self.__bin = self.__to_bin()
         return self.__bin
 
     def getByteArray(self):
@@ -26,7 +31,7 @@ class Binary:
     def __repr__(self):
         count = 0
         data = ""
-        for symbol in self.__bin:
+        for symbol in self.getBin():
             if count == 8:
                 data += '\n'
                 count = 0
@@ -43,7 +48,7 @@ class Binary:
         return new_data
 
     def __to_str(self):
-        return ''.join([str(x) for x in self.__bin])
+        return ''.join([str(x) for x in self.getBin()])
 
 
 class Audio:
@@ -75,14 +80,38 @@ class DataSector:
     width: int
     value: int
 
+
+DATA_SECTOR_DTYPE = np.dtype([("left_edge", np.int64), ("right_edge", np.int64), ("center", np.int64),
+                              ("width", np.int64), ("value", np.int64)])
+
+
+def data_sectors(left_edges, right_edges, values) -> np.recarray:
+    """
+    this method builds column store of data sectors with the same fields as DataSector
+    (one record per bit or symbol, columns are accessed as attributes, e.g. <sectors.left_edge>)
+    :param left_edges: first sample of every sector
+    :param right_edges: last sample (exclusive) of every sector
+    :param values: decoded value of every sector
+    :return: numpy record array
+    """
+    sectors = np.recarray(len(left_edges), dtype=DATA_SECTOR_DTYPE)
+    sectors.left_edge = left_edges
+    sectors.right_edge = right_edges
+    sectors.width = sectors.right_edge - sectors.left_edge
+    sectors.center = (sectors.left_edge + sectors.right_edge) // 2
+    sectors.value = values
+    return sectors
+
+
 @dataclass
 class DemodulatedData:
     demodulator: Demodulator
     digital_samples: list
     demodulated_data: bytearray
-    bits_analysis: List[DataSector]
+    bits_analysis: np.recarray
     audio: Audio
     crc_check_pass: bool
+    profile: dict = field(default_factory=dict)  # stages measured by hub (see modem.profiling.Profiler.report)
 
 
 @dataclass
@@ -93,6 +122,29 @@ class ModulatedData:
     samples: list
     sample_rate: int
     data: Binary
+    profile: dict = field(default_factory=dict)  # stages measured by hub (see modem.profiling.Profiler.report)
+
+
+@dataclass
+class ModulatedStream:
+    modulator: Modulator
+    config: dict
+    blocks: Iterator[np.ndarray]
+    sample_rate: int
+    data: Binary
+
+
+@dataclass
+class AudioStream:
+    blocks: Iterator[np.ndarray]
+    sample_rate: int
+
+
+@dataclass
+class DemodulatedPacket:
+    index: int
+    data: bytearray
+    crc_check_pass: bool
 
 
 def load_config(filepath: str) -> dict:
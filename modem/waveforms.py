@@ -0,0 +1,104 @@
+from functools import lru_cache
+import numpy as np
+import math
+
+TABLE_CACHE_SIZE = 32
+MAX_TABLE_LENGTH = 2 ** 16
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def carrier_table(frequency, sample_rate, quadrature=False):
+    """
+    this method precomputes one exact period of sine carrier, every symbol of amplitude keyed modulations
+    is a scaled slice of this period starting at phase offset of the symbol
+    :param frequency: carrier frequency in Hz
+    :param sample_rate: sample rate in Hz
+    :param quadrature: return complex exponential (cos + j*sin) period instead of sine
+    :return: samples of one carrier period or None when carrier does not repeat within MAX_TABLE_LENGTH samples
+    """
+    if not float(frequency).is_integer() or not float(sample_rate).is_integer() or frequency <= 0:
+        return None
+
+    period = int(sample_rate) // math.gcd(int(sample_rate), int(frequency))
+    if period > MAX_TABLE_LENGTH:
+        return None
+
+    if quadrature:
+        return np.exp(2j * np.pi * frequency * np.arange(period) / sample_rate)
+    return np.sin(2 * np.pi * frequency * np.arange(period) / sample_rate)
+
+
+def carrier(frequency, sample_rate, first_sample, samples_amount):
+    """
+    this method returns sine carrier for samples <first_sample, first_sample + samples_amount)
+    by tiling cached carrier period, phase is taken from global sample index so consecutive calls are continuous
+    """
+    table = carrier_table(frequency, sample_rate)
+    if table is None:
+        return np.sin(2 * np.pi * frequency * np.arange(first_sample, first_sample + samples_amount) / sample_rate)
+
+    return np.resize(np.roll(table, -(first_sample % len(table))), samples_amount)
+
+
+def quadrature_carrier(frequency, sample_rate, first_sample, samples_amount):
+    """
+    this method returns complex carrier exp(j*2*pi*f*n/fs) for samples <first_sample, first_sample + samples_amount)
+    """
+    table = carrier_table(frequency, sample_rate, quadrature=True)
+    if table is None:
+        return np.exp(2j * np.pi * frequency * np.arange(first_sample, first_sample + samples_amount) / sample_rate)
+
+    return np.resize(np.roll(table, -(first_sample % len(table))), samples_amount)
+
+
+def symbol_rows(symbols, samples_amount, samples_per_symbol, first_symbol=0, fill=-1):
+    """
+    this method maps every sample to the symbol it belongs to, symbol <i> spans samples
+    <ceil(i * samples_per_symbol), ceil((i + 1) * samples_per_symbol))
+    :param symbols: symbols to modulate
+    :param samples_amount: amount of samples to map
+    :param samples_per_symbol: amount of samples per symbol (can be fractional)
+    :param first_symbol: index of the first given symbol in the whole stream (mapping starts at its left band)
+    :param fill: value used for samples outside of symbols
+    :return: array of symbol values, one per sample
+    """
+    symbols = np.asarray(symbols)
+    bands = np.ceil(np.arange(first_symbol, first_symbol + len(symbols) + 1) * samples_per_symbol).astype(int)
+    bands = np.clip(bands - bands[0], 0, samples_amount)
+
+    rows = np.full(samples_amount, fill, dtype=np.int64)
+    rows[bands[0]:bands[-1]] = np.repeat(symbols, np.diff(bands))
+    return rows
+
+
+def bit_blocks(byte_array, block_size, samples_per_bit):
+    """
+    this method unpacks bytes to bits in groups spanning roughly <block_size> samples
+    :return: generator of (index of first bit in the stream, array of bits)
+    """
+    bytes_per_block = max(1, int(np.ceil(block_size / (samples_per_bit * 8))))
+    for first_byte in range(0, len(byte_array), bytes_per_block):
+        chunk = np.frombuffer(bytes(byte_array[first_byte:first_byte + bytes_per_block]), dtype=np.uint8)
+        yield first_byte * 8, np.unpackbits(chunk)
+
+
+def gray_code(order):
+    """
+    this method returns bits value carried by every symbol index (neighbouring symbols differ by one bit)
+    """
+    symbols = np.arange(order)
+    return symbols ^ (symbols >> 1)
+
+
+def bits_to_gray_symbols(bits, bits_per_symbol):
+    """
+    this method groups bits into symbols and maps them to gray coded symbol indexes
+    """
+    weights = 1 << np.arange(bits_per_symbol)[::-1]
+    values = np.asarray(bits, dtype=np.int64).reshape(-1, bits_per_symbol) @ weights
+    return np.argsort(gray_code(2 ** bits_per_symbol))[values]
+
+
+def gray_symbols_to_bits(symbols, bits_per_symbol):
+    values = gray_code(2 ** bits_per_symbol)[np.asarray(symbols, dtype=np.int64)]
+    return ((values[:, None] >> np.arange(bits_per_symbol)[::-1]) & 1).astype(np.uint8).ravel()
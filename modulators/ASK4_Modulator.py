@@ -0,0 +1,52 @@
+import numpy as np
+
+from modem.utils import Binary
+from modem.interfaces import Modulator
+from modem.filters import band_pass
+from modem.waveforms import carrier, symbol_rows, bits_to_gray_symbols
+
+
+class ASK4(Modulator):
+    BITS_PER_SYMBOL = 2
+
+    def __init__(self, logger, config, comm_config):
+        logger.debug("4-ASK modulation init")
+        self.logger = logger
+        self.config = config
+        self.comm_config = comm_config
+
+    def modulate(self, input_binary: Binary):
+        self.logger.debug("4-ASK modulation started")
+        self.logger.debug(f"4-ASK modulation loaded config: '{self.config}'")
+
+        sample_rate = self.config["sample_rate[Hz]"]
+        frequency = self.config["carrier_frequency[Hz]"]
+        symbol_rate = self.comm_config["baud_rate[bps]"]
+        amplitudes = np.array(self.config["symbol_amplitudes"])
+        start_silence = self.config["silence_at_start[s]"]
+        end_silence = self.config["silence_at_end[s]"]
+
+        bits = np.unpackbits(np.frombuffer(bytes(input_binary.getByteArray()), dtype=np.uint8))
+        symbols = bits_to_gray_symbols(bits, self.BITS_PER_SYMBOL)
+        samples_per_symbol = sample_rate / symbol_rate
+        samples_amount = int(np.ceil(len(symbols) * samples_per_symbol))
+
+        self.logger.debug(f"data length: {len(symbols)} symbols")
+        self.logger.debug(f"modulated data length: {len(symbols) / symbol_rate}s")
+
+        with self.profiler.stage("shaping"):
+            samples = carrier(frequency, sample_rate, 0, samples_amount)
+            samples *= amplitudes[symbol_rows(symbols, samples_amount, samples_per_symbol)]
+            samples = np.concatenate((np.zeros(int(start_silence * sample_rate)), samples,
+                                      np.zeros(int(end_silence * sample_rate))))
+
+        self.logger.info("applying filter...")
+        with self.profiler.stage("filtering"):
+            samples = band_pass(samples, frequency, sample_rate, offset=100)
+            samples /= np.max(np.abs(samples), axis=0)
+
+        times = np.arange(len(samples)) / sample_rate
+
+        self.logger.info("modulation complete!")
+
+        return times, samples, sample_rate, self
@@ -1,12 +1,16 @@
-from scipy.signal import butter, filtfilt
+from typing import List
 import numpy as np
 import sys
 
 from modem.utils import Binary
+from modem.filters import band_pass, band_pass_causal, band_pass_gain
+from modem.waveforms import carrier, symbol_rows, bit_blocks
 from modem.interfaces import Modulator
 
 
 class ASK(Modulator):
+    BATCH_SAMPLES = 2 ** 22
+
     def __init__(self, logger, config, comm_config):
         logger.debug("ASK modulation init")
         self.logger = logger
@@ -18,12 +22,7 @@ class ASK(Modulator):
         self.logger.debug(f"ASK modulation loaded config: '{self.config}'")
 
         sample_rate = self.config["sample_rate[Hz]"]
-        frequency = self.config["carrier_frequency[Hz]"]
         baud_rate = self.comm_config["baud_rate[bps]"]
-        one_symbol_amplitude = self.config["one_symbol_amplitude"]
-        zero_symbol_amplitude = self.config["zero_symbol_amplitude"]
-        start_silence = self.config["silence_at_start[s]"]
-        end_silence = self.config["silence_at_end[s]"]
 
         data = input_binary.getBin()
         data_len = input_binary.getSize()
@@ -31,63 +30,163 @@ class ASK(Modulator):
         if data_len < 1000:
             self.logger.debug(f"data to modulate: \n{input_binary}")
         self.logger.debug(f"data length: {data_len} symbols")
+        self.logger.debug(f"modulated data length: {data_len / baud_rate}s")
 
-        theta = 0
-        amplitude = 1
+        np.set_printoptions(threshold=sys.maxsize)
 
-        start_time = 0
-        end_time = data_len / baud_rate
+        times, samples = self.__modulate_rows(np.asarray(data, dtype=np.uint8)[None, :])
+        samples = samples[0]
 
-        self.logger.debug(f"modulated data length: {end_time}s")
+        self.logger.info("modulation complete!")
 
-        time = np.arange(start_time, end_time, 1 / sample_rate)
+        return times, samples, sample_rate, self
 
-        np.set_printoptions(threshold=sys.maxsize)
+    def modulate_many(self, input_binaries: List[Binary]):
+        self.logger.debug(f"ASK batch modulation of {len(input_binaries)} payloads started")
+        self.logger.debug(f"ASK modulation loaded config: '{self.config}'")
 
-        times = time
-        samples = amplitude * np.sin(2 * np.pi * frequency * time + theta)
+        sample_rate = self.config["sample_rate[Hz]"]
 
-        for i in range(len(data)):
-            left_band = np.ceil(i * (sample_rate / baud_rate)).astype(int)
-            right_band = np.ceil((i + 1) * (sample_rate / baud_rate)).astype(int)
-            if right_band > len(samples):
-                right_band = len(samples)
-            for x in range(left_band, right_band):
-                samples[x] = samples[x] * one_symbol_amplitude if data[i] == 1 else samples[x] * zero_symbol_amplitude
+        # payloads of equal length share carrier, times and filter pass, so every group is modulated as one matrix
+        groups = {}
+        for i, input_binary in enumerate(input_binaries):
+            groups.setdefault(len(input_binary.getByteArray()), []).append(i)
+
+        results = [None] * len(input_binaries)
+        for indexes in groups.values():
+            bits = np.unpackbits(np.frombuffer(bytes(b"".join(input_binaries[i].getByteArray() for i in indexes)),
+                                               dtype=np.uint8)).reshape(len(indexes), -1)
+            rows_per_pass = max(1, self.BATCH_SAMPLES // max(1, self.__row_length(bits.shape[1])))
+            for first in range(0, len(indexes), rows_per_pass):
+                times, samples = self.__modulate_rows(bits[first:first + rows_per_pass])
+                for i, row in zip(indexes[first:first + rows_per_pass], samples):
+                    results[i] = (times, row, sample_rate, self)
+
+        self.logger.info("batch modulation complete!")
+
+        return results
+
+    def __row_length(self, data_len):
+        """
+        this method returns amount of samples of waveform carrying <data_len> bits
+        """
+        sample_rate = self.config["sample_rate[Hz]"]
+        return len(np.arange(0, data_len / self.comm_config["baud_rate[bps]"], 1 / sample_rate)) + \
+            int(self.config["silence_at_start[s]"] * 1000) + int(self.config["silence_at_end[s]"] * 1000)
+
+    def __modulate_rows(self, bits):
+        """
+        this method modulates many payloads of the same length at once
+        :param bits: 2d array of bits, one payload per row
+        :return: times shared by all waveforms and 2d array of samples, one waveform per row
+        """
+        sample_rate = self.config["sample_rate[Hz]"]
+        frequency = self.config["carrier_frequency[Hz]"]
+        baud_rate = self.comm_config["baud_rate[bps]"]
+        one_symbol_amplitude = self.config["one_symbol_amplitude"]
+        zero_symbol_amplitude = self.config["zero_symbol_amplitude"]
+        start_silence = self.config["silence_at_start[s]"]
+        end_silence = self.config["silence_at_end[s]"]
 
-        # TODO: make better start padding
+        data_len = bits.shape[1]
+        time = np.arange(0, data_len / baud_rate, 1 / sample_rate)
 
-        samples = np.insert(samples, 0, [0 for x in range(int(start_silence*1000))])
-        times = [t+start_silence for t in times]
-        times = np.insert(times, 0, [x*start_silence for x in range(int(start_silence*1000))])
+        with self.profiler.stage("shaping"):
+            # every sample points at its bit column, samples outside of symbols point at extra column of amplitude 1
+            columns = symbol_rows(np.arange(data_len), len(time), sample_rate / baud_rate, fill=data_len)
+            amplitudes = np.array([zero_symbol_amplitude, one_symbol_amplitude, 1.0])
+            symbols = np.hstack((bits, np.full((len(bits), 1), 2, dtype=bits.dtype)))
+            samples = carrier(frequency, sample_rate, 0, len(time))[None, :] * amplitudes[symbols[:, columns]]
+
+        # TODO: make better start padding
 
-        samples = np.append(samples, [0 for x in range(int(end_silence * 1000))], axis=0)
-        times = np.append(times, [times[-1] + x / 1000 for x in range(int(end_silence * 1000))], axis=0)
+        start_padding = int(start_silence * 1000)
+        end_padding = int(end_silence * 1000)
+        samples = np.pad(samples, ((0, 0), (start_padding, end_padding)))
+        times = time + start_silence
+        times = np.concatenate((np.arange(start_padding) * start_silence, times,
+                                times[-1] + np.arange(end_padding) / 1000))
 
         self.logger.info("applying filter...")
 
         apply_filters = True
 
         if apply_filters:
-            offset = 100
-            _cut_freq = frequency + offset
-            _order = 2
-            nyq = 0.5 * sample_rate
-            normal_cutoff = _cut_freq / nyq
-            # Get the filter coefficients
-            b, a = butter(_order, normal_cutoff, btype='low', analog=False, output='ba')  # noqa
-            samples = filtfilt(b, a, samples)
-
-            _cut_freq = frequency - offset
-            _order = 2
-            nyq = 0.5 * sample_rate
-            normal_cutoff = _cut_freq / nyq
-            # Get the filter coefficients
-            b, a = butter(_order, normal_cutoff, btype='high', analog=False, output='ba')  # noqa
-            samples = filtfilt(b, a, samples)
-
-            samples /= np.max(np.abs(samples), axis=0)
+            with self.profiler.stage("filtering"):
+                samples = band_pass(samples, frequency, sample_rate, offset=100)
+                samples /= np.max(np.abs(samples), axis=1, keepdims=True)
 
-        self.logger.info("modulation complete!")
+        return times, samples
 
-        return times, samples, sample_rate, self
+    def modulate_stream(self, input_binary: Binary, block_size=4096):
+        self.logger.debug("ASK stream modulation started")
+        self.logger.debug(f"ASK modulation loaded config: '{self.config}'")
+
+        sample_rate = self.config["sample_rate[Hz]"]
+        frequency = self.config["carrier_frequency[Hz]"]
+        baud_rate = self.comm_config["baud_rate[bps]"]
+        one_symbol_amplitude = self.config["one_symbol_amplitude"]
+        zero_symbol_amplitude = self.config["zero_symbol_amplitude"]
+        start_silence = self.config["silence_at_start[s]"]
+        end_silence = self.config["silence_at_end[s]"]
+
+        samples_per_bit = sample_rate / baud_rate
+        self.logger.debug(f"data length: {input_binary.getSize()} symbols")
+        self.logger.debug(f"modulated data length: {input_binary.getSize() / baud_rate}s")
+
+        # causal band-pass, its state is carried between blocks so output is continuous
+        offset = 100
+        zi = None
+        gain = band_pass_gain(frequency, offset, sample_rate) * max(one_symbol_amplitude, zero_symbol_amplitude)
+
+        def pieces():
+            yield np.zeros(int(start_silence * 1000))
+            yield from self.__carrier_pieces(input_binary.getByteArray(), block_size, samples_per_bit, frequency,
+                                             sample_rate, one_symbol_amplitude, zero_symbol_amplitude)
+            yield np.zeros(int(end_silence * 1000))
+
+        buffer = np.empty(0)
+        for piece in pieces():
+            with self.profiler.stage("filtering"):
+                filtered, zi = band_pass_causal(piece, frequency, sample_rate, offset=offset, zi=zi)
+                buffer = np.concatenate((buffer, np.clip(filtered / gain, -1, 1)))
+            while len(buffer) >= block_size:
+                yield buffer[:block_size]
+                buffer = buffer[block_size:]
+
+        if len(buffer):
+            yield buffer
+
+        self.logger.info("stream modulation complete!")
+
+    def __carrier_pieces(self, byte_array, block_size, samples_per_bit, frequency, sample_rate,
+                         one_symbol_amplitude, zero_symbol_amplitude):
+        """
+        this method yields shaped carrier for consecutive groups of bytes,
+        carrier phase is taken from global sample index so it stays continuous between pieces
+        """
+        for first_bit, bits in bit_blocks(byte_array, block_size, samples_per_bit):
+            with self.profiler.stage("shaping"):
+                left = int(np.ceil(first_bit * samples_per_bit))
+                right = int(np.ceil((first_bit + len(bits)) * samples_per_bit))
+                shaped = carrier(frequency, sample_rate, left, right - left)
+                shaped = shaped * self.symbol_envelope(bits, len(shaped), samples_per_bit, one_symbol_amplitude,
+                                                       zero_symbol_amplitude, first_bit=first_bit)
+            yield shaped
+
+    @staticmethod
+    def symbol_envelope(data, samples_amount, samples_per_bit, one_symbol_amplitude, zero_symbol_amplitude,
+                        first_bit=0):
+        """
+        this method builds amplitude envelope for whole bitstream at once
+        :param data: list of bits to modulate
+        :param samples_amount: length of the carrier the envelope will be applied to
+        :param samples_per_bit: amount of samples per symbol (can be fractional)
+        :param one_symbol_amplitude: amplitude of '1' symbol
+        :param zero_symbol_amplitude: amplitude of '0' symbol
+        :param first_bit: index of the first given bit in the whole bitstream (envelope starts at its left band)
+        :return: array of amplitudes, samples outside of symbols are left with amplitude of 1
+        """
+        amplitudes = np.array([zero_symbol_amplitude, one_symbol_amplitude, 1.0])
+        return amplitudes[symbol_rows(np.asarray(data, dtype=np.uint8), samples_amount, samples_per_bit,
+                                      first_symbol=first_bit, fill=2)]
@@ -1,12 +1,64 @@
+import numpy as np
+
+from modem.utils import Binary
 from modem.interfaces import Modulator
+from modem.waveforms import symbol_rows, bit_blocks
 
 
 class FSK(Modulator):
-    def __init__(self, logger):
-        print("fsk init")
+    def __init__(self, logger, config, comm_config):
+        logger.debug("FSK modulation init")
         self.logger = logger
+        self.config = config
+        self.comm_config = comm_config
+
+    def modulate(self, input_binary: Binary):
+        self.logger.debug("FSK modulation started")
+        self.logger.debug(f"FSK modulation loaded config: '{self.config}'")
+
+        sample_rate = self.config["sample_rate[Hz]"]
+
+        samples = np.concatenate(list(self.modulate_stream(input_binary, block_size=sample_rate)))
+        times = np.arange(len(samples)) / sample_rate
+
+        self.logger.info("modulation complete!")
+
+        return times, samples, sample_rate, self
+
+    def modulate_stream(self, input_binary: Binary, block_size=4096):
+        sample_rate = self.config["sample_rate[Hz]"]
+        baud_rate = self.comm_config["baud_rate[bps]"]
+        frequencies = np.array([self.config["zero_symbol_frequency[Hz]"], self.config["one_symbol_frequency[Hz]"]])
+        amplitude = self.config["amplitude"]
+        start_silence = self.config["silence_at_start[s]"]
+        end_silence = self.config["silence_at_end[s]"]
+
+        samples_per_bit = sample_rate / baud_rate
+        self.logger.debug(f"data length: {input_binary.getSize()} symbols")
+        self.logger.debug(f"modulated data length: {input_binary.getSize() / baud_rate}s")
+
+        def pieces():
+            yield np.zeros(int(start_silence * sample_rate))
+            # phase accumulator is carried between pieces so the carrier never jumps on symbol boundaries
+            phase = 0.0
+            for first_bit, bits in bit_blocks(input_binary.getByteArray(), block_size, samples_per_bit):
+                with self.profiler.stage("shaping"):
+                    left = int(np.ceil(first_bit * samples_per_bit))
+                    right = int(np.ceil((first_bit + len(bits)) * samples_per_bit))
+                    rows = symbol_rows(bits, right - left, samples_per_bit, first_symbol=first_bit)
+                    phase_steps = 2 * np.pi * frequencies[rows] / sample_rate
+                    phases = phase + np.cumsum(phase_steps) - phase_steps
+                    phase = (phases[-1] + phase_steps[-1]) % (2 * np.pi) if len(phases) else phase
+                    shaped = amplitude * np.sin(phases)
+                yield shaped
+            yield np.zeros(int(end_silence * sample_rate))
 
-    def modulate(self, input_binary):
-        print("modulating fsk")
+        buffer = np.empty(0)
+        for piece in pieces():
+            buffer = np.concatenate((buffer, piece))
+            while len(buffer) >= block_size:
+                yield buffer[:block_size]
+                buffer = buffer[block_size:]
 
-        return []
+        if len(buffer):
+            yield buffer
@@ -0,0 +1,56 @@
+import numpy as np
+
+from modem.utils import Binary
+from modem.interfaces import Modulator
+from modem.psk import constellation
+from modem.waveforms import bits_to_gray_symbols
+from modem.ofdm import layout, bits_per_symbol, training_symbol, scramble, symbols_to_samples, \
+    PILOT_SYMBOL
+
+
+class OFDM(Modulator):
+    def __init__(self, logger, config, comm_config):
+        logger.debug("OFDM modulation init")
+        self.logger = logger
+        self.config = config
+        self.comm_config = comm_config
+
+    def modulate(self, input_binary: Binary):
+        self.logger.debug("OFDM modulation started")
+        self.logger.debug(f"OFDM modulation loaded config: '{self.config}'")
+
+        sample_rate = self.config["sample_rate[Hz]"]
+        fft_size = self.config["fft_size"]
+        cyclic_prefix = self.config["cyclic_prefix"]
+        amplitude = self.config["amplitude"]
+        start_silence = self.config["silence_at_start[s]"]
+        end_silence = self.config["silence_at_end[s]"]
+
+        used, pilots = layout(self.config)
+        symbol_bits = bits_per_symbol(self.config)
+        symbol_rate = sample_rate / (fft_size + cyclic_prefix)
+        self.logger.debug(f"{np.count_nonzero(~pilots)} data subcarriers, {symbol_rate:.1f} symbols/s, "
+                          f"{symbol_bits * symbol_rate:.0f}bps (baud_rate[bps] is not used by OFDM)")
+
+        bits = np.unpackbits(np.frombuffer(bytes(input_binary.getByteArray()), dtype=np.uint8))
+        symbols_amount = int(np.ceil(len(bits) / symbol_bits))
+        bits = np.concatenate((bits, np.zeros(symbols_amount * symbol_bits - len(bits), dtype=np.uint8)))
+        self.logger.debug(f"data length: {symbols_amount} OFDM symbols")
+
+        with self.profiler.stage("mapping"):
+            training = training_symbol(self.config)
+            grid = np.empty((symbols_amount, len(used)), dtype=np.complex128)
+            grid[:, pilots] = np.exp(1j * constellation(4)[PILOT_SYMBOL])
+            grid[:, ~pilots] = np.exp(1j * constellation(4)[bits_to_gray_symbols(bits, 2)]).reshape(symbols_amount, -1)
+            grid = np.vstack((training, scramble(grid, training)))
+
+        with self.profiler.stage("shaping"):
+            samples = symbols_to_samples(grid, used, fft_size, cyclic_prefix)
+            samples *= amplitude / np.max(np.abs(samples))
+            samples = np.concatenate((np.zeros(int(start_silence * sample_rate)), samples,
+                                      np.zeros(int(end_silence * sample_rate))))
+        times = np.arange(len(samples)) / sample_rate
+
+        self.logger.info("modulation complete!")
+
+        return times, samples, sample_rate, self
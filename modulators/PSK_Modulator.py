@@ -0,0 +1,91 @@
+from abc import abstractmethod
+import numpy as np
+
+from modem.utils import Binary
+from modem.interfaces import Modulator
+from modem.waveforms import quadrature_carrier, symbol_rows, bit_blocks, bits_to_gray_symbols
+from modem.psk import constellation, sync_increments, SYNC_WORD
+
+
+class PSK(Modulator):
+    def __init__(self, logger, config, comm_config):
+        logger.debug(f"{self.__class__.__name__} modulation init")
+        self.logger = logger
+        self.config = config
+        self.comm_config = comm_config
+
+    @property
+    @abstractmethod
+    def bits_per_symbol(self):
+        pass
+
+    def modulate(self, input_binary: Binary):
+        self.logger.debug(f"{self.__class__.__name__} modulation started")
+        self.logger.debug(f"{self.__class__.__name__} modulation loaded config: '{self.config}'")
+
+        sample_rate = self.config["sample_rate[Hz]"]
+
+        samples = np.concatenate(list(self.modulate_stream(input_binary, block_size=sample_rate)))
+        times = np.arange(len(samples)) / sample_rate
+
+        self.logger.info("modulation complete!")
+
+        return times, samples, sample_rate, self
+
+    def modulate_stream(self, input_binary: Binary, block_size=4096):
+        sample_rate = self.config["sample_rate[Hz]"]
+        frequency = self.config["carrier_frequency[Hz]"]
+        amplitude = self.config["amplitude"]
+        preamble_symbols = self.config["preamble_symbols"]
+        start_silence = self.config["silence_at_start[s]"]
+        end_silence = self.config["silence_at_end[s]"]
+        symbol_rate = self.comm_config["baud_rate[bps]"]
+
+        order = 2 ** self.bits_per_symbol
+        samples_per_symbol = sample_rate / symbol_rate
+        points = amplitude * np.exp(1j * constellation(order))
+        self.logger.debug(f"data length: {input_binary.getSize() // self.bits_per_symbol} symbols")
+        self.logger.debug(f"modulated data length: {input_binary.getSize() / self.bits_per_symbol / symbol_rate}s")
+
+        def symbol_blocks():
+            # preamble of 180 degree phase flips gives receiver loops transitions to lock on
+            yield 0, np.full(preamble_symbols, order // 2)
+            # sync word tells receiver where data starts
+            yield preamble_symbols, sync_increments(order)
+            for first_bit, bits in bit_blocks(input_binary.getByteArray(), block_size,
+                                              samples_per_symbol / self.bits_per_symbol):
+                first_symbol = preamble_symbols + len(SYNC_WORD) + first_bit // self.bits_per_symbol
+                yield first_symbol, bits_to_gray_symbols(bits, self.bits_per_symbol)
+
+        def pieces():
+            yield np.zeros(int(start_silence * sample_rate))
+            point = 0
+            for first_symbol, increments in symbol_blocks():
+                with self.profiler.stage("shaping"):
+                    indexes = (point + np.cumsum(increments)) % order
+                    point = indexes[-1] if len(indexes) else point
+
+                    left = int(np.ceil(first_symbol * samples_per_symbol))
+                    right = int(np.ceil((first_symbol + len(indexes)) * samples_per_symbol))
+                    rows = symbol_rows(indexes, right - left, samples_per_symbol, first_symbol=first_symbol)
+                    shaped = np.real(points[rows] * quadrature_carrier(frequency, sample_rate, left, right - left))
+                yield shaped
+            yield np.zeros(int(end_silence * sample_rate))
+
+        buffer = np.empty(0)
+        for piece in pieces():
+            buffer = np.concatenate((buffer, piece))
+            while len(buffer) >= block_size:
+                yield buffer[:block_size]
+                buffer = buffer[block_size:]
+
+        if len(buffer):
+            yield buffer
+
+
+class BPSK(PSK):
+    bits_per_symbol = 1
+
+
+class QPSK(PSK):
+    bits_per_symbol = 2
@@ -167,7 +167,7 @@ class PeerToPeerHub:
             if len(self.__messages_to_send):
                 message = self.__messages_to_send[0]
                 binary = Binary(bytearray(str(message).encode('utf-8')))
-                encoded_message = self.__modulator_hub.encode_data(binary)
+                encoded_message = self.__modulator_hub.encode_data(self.__modulator_hub.compress_data(binary))
                 modulated_data = self.__modulator_hub.modulate(encoded_message, self.__modulation_type)
                 self.__audio_manager.play(modulated_data.samples)
                 self.ui.chatbuffer_add(message)
@@ -194,6 +194,8 @@ class PeerToPeerHub:
                     continue
                 if obj == package_type:
                     continue
+                if inspect.isabstract(obj):
+                    continue
 
                 package[name] = obj
 
@@ -0,0 +1,178 @@
+import argparse
+import logging
+import random
+import time
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(f"{'/'.join(os.path.dirname(os.path.realpath(__file__)).split('/')[:-1])}")
+sys.path.append(f"{'/'.join(os.path.dirname(os.path.realpath(__file__)).split('/')[:-1])}/modulators")
+sys.path.append(f"{'/'.join(os.path.dirname(os.path.realpath(__file__)).split('/')[:-1])}/demodulators")
+
+from ASK_Modulator import ASK as ASKModulator  # noqa
+from ASK_Demodulator import ASK as ASKDemodulator  # noqa
+from ASK4_Modulator import ASK4 as ASK4Modulator  # noqa
+from ASK4_Demodulator import ASK4 as ASK4Demodulator  # noqa
+from FSK_Modulator import FSK as FSKModulator  # noqa
+from FSK_Demodulator import FSK as FSKDemodulator  # noqa
+from PSK_Modulator import BPSK as BPSKModulator, QPSK as QPSKModulator  # noqa
+from PSK_Demodulator import BPSK as BPSKDemodulator, QPSK as QPSKDemodulator  # noqa
+from OFDM_Modulator import OFDM as OFDMModulator  # noqa
+from OFDM_Demodulator import OFDM as OFDMDemodulator  # noqa
+from modem.utils import Binary, Audio, load_config  # noqa
+
+'''
+python3 tests/benchmark.py envelope
+python3 tests/benchmark.py envelope --sizes 1024 102400 --baudrate 2000
+python3 tests/benchmark.py throughput --sizes 1024 10240 --baudrate 1000
+'''
+
+KB = 1024
+MB = 1024 * KB
+
+
+def legacy_envelope(samples, data, sample_rate, baud_rate, one_symbol_amplitude, zero_symbol_amplitude, first_bit=0):
+    """
+    per sample loop used by ASK modulator before vectorization (kept as a reference point)
+    """
+    offset = np.ceil(first_bit * (sample_rate / baud_rate)).astype(int)
+    for i in range(first_bit, first_bit + len(data)):
+        left_band = np.ceil(i * (sample_rate / baud_rate)).astype(int) - offset
+        right_band = np.ceil((i + 1) * (sample_rate / baud_rate)).astype(int) - offset
+        if right_band > len(samples):
+            right_band = len(samples)
+        for x in range(left_band, right_band):
+            samples[x] = samples[x] * one_symbol_amplitude if data[i - first_bit] == 1 else samples[x] * zero_symbol_amplitude
+    return samples
+
+
+def blocks_of_bits(payload_size, block_bits):
+    """
+    yields random bit blocks so that payloads bigger than available memory can be measured
+    """
+    total_bits = payload_size * 8
+    for first_bit in range(0, total_bits, block_bits):
+        bits_amount = min(block_bits, total_bits - first_bit)
+        yield first_bit, np.random.randint(0, 2, bits_amount).tolist()
+
+
+def carrier(first_bit, bits_amount, sample_rate, baud_rate, frequency):
+    left = int(np.ceil(first_bit * (sample_rate / baud_rate)))
+    right = int(np.ceil((first_bit + bits_amount) * (sample_rate / baud_rate)))
+    return np.sin(2 * np.pi * frequency * np.arange(left, right) / sample_rate)
+
+
+def benchmark_envelope(args):
+    config = {"sample_rate[Hz]": 44100, "carrier_frequency[Hz]": 3000,
+              "one_symbol_amplitude": 1.0, "zero_symbol_amplitude": 0.1}
+    sample_rate = config["sample_rate[Hz]"]
+    one = config["one_symbol_amplitude"]
+    zero = config["zero_symbol_amplitude"]
+    baud_rate = args.baudrate
+
+    print(f"ASK symbol shaping ({sample_rate}Hz, {baud_rate}bps, {sample_rate / baud_rate:.2f} samples per bit)")
+    print(f"{'payload':>10} | {'legacy loop':>14} | {'vectorized':>12} | {'speedup':>9}")
+
+    legacy_rate = None
+    for size in args.sizes:
+        vectorized_time = 0
+        legacy_time = 0
+        measure_legacy = size <= args.legacy_limit
+        for first_bit, bits in blocks_of_bits(size, args.block_bits):
+            samples = carrier(first_bit, len(bits), sample_rate, baud_rate, config["carrier_frequency[Hz]"])
+
+            start = time.perf_counter()
+            vectorized = samples * ASKModulator.symbol_envelope(bits, len(samples), sample_rate / baud_rate,
+                                                                 one, zero, first_bit=first_bit)
+            vectorized_time += time.perf_counter() - start
+
+            if measure_legacy:
+                start = time.perf_counter()
+                legacy = legacy_envelope(samples, bits, sample_rate, baud_rate, one, zero, first_bit=first_bit)
+                legacy_time += time.perf_counter() - start
+                assert np.array_equal(legacy, vectorized), "vectorized envelope differs from legacy loop"
+
+        if measure_legacy:
+            legacy_rate = legacy_time / size
+            legacy_label = f"{legacy_time:.3f}s"
+        elif legacy_rate is not None:
+            legacy_time = legacy_rate * size
+            legacy_label = f"~{legacy_time:.1f}s est."
+        else:
+            legacy_label = "skipped"
+
+        speedup = f"{legacy_time / vectorized_time:.0f}x" if legacy_time else "-"
+        print(f"{size_label(size):>10} | {legacy_label:>14} | {vectorized_time:>11.3f}s | {speedup:>9}")
+
+
+def benchmark_throughput(args):
+    configs_path = f"{'/'.join(os.path.dirname(os.path.realpath(__file__)).split('/')[:-1])}/configs"
+    comm_config = load_config(f"{configs_path}/communication_config.json")
+    comm_config["baud_rate[bps]"] = args.baudrate
+    logger = logging.getLogger("benchmark")
+    logger.disabled = True  # payload is not framed into packets, crc errors are expected
+
+    modems = {"ASK": (ASKModulator, ASKDemodulator), "ASK4": (ASK4Modulator, ASK4Demodulator),
+              "FSK": (FSKModulator, FSKDemodulator),
+              "BPSK": (BPSKModulator, BPSKDemodulator), "QPSK": (QPSKModulator, QPSKDemodulator),
+              "OFDM": (OFDMModulator, OFDMDemodulator)}
+
+    print(f"modem throughput ({args.baudrate}bps)")
+    print(f"{'modem':>6} | {'payload':>8} | {'audio':>9} | {'modulation':>22} | {'demodulation':>22}")
+    for size in args.sizes:
+        binary = Binary(bytearray(np.random.randint(0, 256, size, dtype=np.uint8).tobytes()))
+        for name, (modulator_type, demodulator_type) in modems.items():
+            modulator = modulator_type(logger, load_config(f"{configs_path}/{name}_Modulator.json"), comm_config)
+            demodulator = demodulator_type(logger, load_config(f"{configs_path}/{name}_Demodulator.json"),
+                                           comm_config)
+
+            start = time.perf_counter()
+            times, samples, sample_rate, _ = modulator.modulate(binary)
+            modulation_time = time.perf_counter() - start
+
+            samples = np.asarray(samples, dtype=np.float32)
+            audio = Audio(samples, sample_rate, len(samples), len(samples) / sample_rate)
+            start = time.perf_counter()
+            demodulator.demodulate(audio)
+            demodulation_time = time.perf_counter() - start
+
+            modulation = f"{modulation_time:.3f}s {len(samples) / modulation_time / 1e6:6.2f}MS/s"
+            demodulation = f"{demodulation_time:.3f}s {len(samples) / demodulation_time / 1e6:6.2f}MS/s"
+            print(f"{name:>6} | {size_label(size):>8} | {audio.getAudioLength():>8.1f}s | {modulation:>22} | "
+                  f"{demodulation:>22}")
+
+
+def size_label(size):
+    if size >= MB:
+        return f"{size / MB:g}MB"
+    if size >= KB:
+        return f"{size / KB:g}KB"
+    return f"{size}B"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='python modem performance benchmarks')
+    parser.add_argument("suite", choices=["envelope", "throughput"], help="benchmark to run")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[KB, 100 * KB, 10 * MB],
+                        help="payload sizes in bytes")
+    parser.add_argument("--baudrate", type=int, default=2000, help="baud rate used for benchmark")
+    parser.add_argument("--block-bits", type=int, default=2 ** 16,
+                        help="bits processed at once (bounds memory for big payloads)")
+    parser.add_argument("--legacy-limit", type=int, default=100 * KB,
+                        help="biggest payload measured with legacy loop, bigger ones are extrapolated")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    random.seed(0)
+    np.random.seed(0)
+
+    if args.suite == "envelope":
+        benchmark_envelope(args)
+    elif args.suite == "throughput":
+        benchmark_throughput(args)
+
+
+if __name__ == "__main__":
+    main()
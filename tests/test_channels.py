@@ -0,0 +1,56 @@
+import unittest
+import logging
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(f"{'/'.join(os.path.dirname(os.path.realpath(__file__)).split('/')[:-1])}")
+
+from modem.utils import Binary, Audio, load_config  # noqa
+from modem.framing import data_to_packets  # noqa
+from modulators import ASK_Modulator  # noqa
+from demodulators import ASK_Demodulator  # noqa
+
+
+class ASKChannelsTest(unittest.TestCase):
+    CARRIERS = [2000, 4500, 7000, 9500]
+
+    def setUp(self):
+        self.logger = logging.getLogger("channels tests")
+        self.logger.addHandler(logging.NullHandler())
+        self.logger.propagate = False
+        self.configs = f"{'/'.join(os.path.dirname(os.path.realpath(__file__)).split('/')[:-1])}/configs"
+        self.comm_config = load_config(f"{self.configs}/communication_config.json")
+        self.comm_config["baud_rate[bps]"] = 100
+        self.data = [f"channel at {carrier}Hz says hello".encode() * (n + 1) for n, carrier in enumerate(self.CARRIERS)]
+
+    def multiplex(self):
+        """
+        this method modulates test data of every channel on its carrier and sums channels into one recording
+        normalised to full scale, like a recorded multiplex
+        :return: samples of the recording and its sample rate
+        """
+        recording = np.zeros(0)
+        for carrier, data in zip(self.CARRIERS, self.data):
+            config = {**load_config(f"{self.configs}/ASK_Modulator.json"), "carrier_frequency[Hz]": carrier}
+            modulator = ASK_Modulator.ASK(self.logger, config, self.comm_config)
+            packets = data_to_packets(data, self.comm_config)
+            _, samples, sample_rate, _ = modulator.modulate(Binary(bytearray(packets.tobytes())))
+            samples = np.asarray(samples, dtype=np.float64)
+            length = max(len(recording), len(samples))
+            recording = np.pad(recording, (0, length - len(recording))) + np.pad(samples, (0, length - len(samples)))
+        recording /= np.max(np.abs(recording))
+        return recording + np.random.default_rng(0).normal(0, 0.02, len(recording)), sample_rate
+
+    def test_normalised_multiplex(self):
+        samples, sample_rate = self.multiplex()
+        config = load_config(f"{self.configs}/ASK_Demodulator.json")
+        demodulator = ASK_Demodulator.ASK(self.logger, config, self.comm_config)
+        channels = demodulator.demodulate_channels(Audio(samples, sample_rate, len(samples), len(samples) / sample_rate),
+                                                   self.CARRIERS)
+        self.assertEqual(len(channels), len(self.CARRIERS))
+        for carrier, data, demodulated_data in zip(self.CARRIERS, self.data, channels):
+            with self.subTest(carrier=carrier):
+                self.assertTrue(demodulated_data.crc_check_pass)
+                self.assertEqual(bytes(demodulated_data.demodulated_data), data)
@@ -0,0 +1,36 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(f"{'/'.join(os.path.dirname(os.path.realpath(__file__)).split('/')[:-1])}")
+
+from modem.checksum import crc8  # noqa
+
+
+class Crc8Test(unittest.TestCase):
+    def crc(self, message):
+        return int(crc8(np.frombuffer(message, dtype=np.uint8)[None, :])[0])
+
+    def test_check_value(self):
+        # check value of CRC-8/CCITT (polynomial 0x07, no reflection, initial value and final xor 0)
+        self.assertEqual(self.crc(b"123456789"), 0xF4)
+
+    def test_known_vectors(self):
+        self.assertEqual(self.crc(b"\x00"), 0x00)
+        self.assertEqual(self.crc(b"\x01"), 0x07)
+        self.assertEqual(self.crc(b"\xff"), 0xF3)
+        self.assertEqual(self.crc(b"\x01\x02"), 0x1B)
+
+    def test_rows_are_independent(self):
+        packets = np.frombuffer(b"123456789" * 2 + b"987654321", dtype=np.uint8).reshape(3, 9)
+        np.testing.assert_array_equal(crc8(packets), [0xF4, 0xF4, self.crc(b"987654321")])
+
+    def test_crc_of_message_with_crc_is_zero(self):
+        message = b"hello packet"
+        self.assertEqual(self.crc(message + bytes([self.crc(message)])), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
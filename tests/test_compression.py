@@ -0,0 +1,57 @@
+import unittest
+import sys
+import os
+
+sys.path.append(f"{'/'.join(os.path.dirname(os.path.realpath(__file__)).split('/')[:-1])}")
+
+from modem.compression import METHODS, STORED, compress_with, compress_payload, decompress_payload  # noqa
+
+
+class CompressionTest(unittest.TestCase):
+    PAYLOADS = [b"message ending with null bytes " * 8 + b"\x00" * 40,
+                b"\x00" * 300,
+                bytes(range(256)) * 2 + b"\x00"]
+
+    @staticmethod
+    def received(payload):
+        # framing strips trailing null bytes of the last packet together with its padding
+        return payload.rstrip(b"\x00")
+
+    def test_every_method(self):
+        for payload in self.PAYLOADS:
+            for method, (name, _, _) in METHODS.items():
+                with self.subTest(method=name, payload=payload[:8]):
+                    compressed = compress_with(method, payload)
+                    self.assertEqual(decompress_payload(self.received(compressed)), payload)
+
+    def test_smallest_method_is_chosen(self):
+        for payload in self.PAYLOADS:
+            with self.subTest(payload=payload[:8]):
+                compressed, name = compress_payload(payload)
+                self.assertLess(len(compressed), len(payload))
+                self.assertEqual(decompress_payload(self.received(compressed)), payload)
+
+    def test_incompressible_payload_is_stored(self):
+        payload = bytes(range(1, 40))
+        compressed, name = compress_payload(payload)
+        self.assertEqual((compressed[0], name), (STORED, "stored"))
+        self.assertEqual(decompress_payload(compressed), payload)
+
+    def test_joined_payloads_are_rejected(self):
+        first, _ = compress_payload(b"first transmission " * 10)
+        second, _ = compress_payload(b"second transmission " * 10)
+        with self.assertRaises(ValueError):
+            decompress_payload(first + second)
+
+    def test_truncated_payload_is_rejected(self):
+        compressed, _ = compress_payload(b"truncated transmission " * 10)
+        with self.assertRaises(ValueError):
+            decompress_payload(compressed[:len(compressed) // 2])
+
+    def test_unknown_method_is_rejected(self):
+        with self.assertRaises(ValueError):
+            decompress_payload(b"\xff" + b"payload")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(f"{'/'.join(os.path.dirname(os.path.realpath(__file__)).split('/')[:-1])}")
+
+from modem.fec import ReedSolomon, Convolutional  # noqa
+
+
+class ReedSolomonTest(unittest.TestCase):
+    BODY_LEN = 20
+    PARITY = 6
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.code = ReedSolomon(self.PARITY)
+        self.bodies = self.rng.integers(0, 256, (50, self.BODY_LEN), dtype=np.uint8)
+
+    def damage(self, coded, errors):
+        """
+        this method changes <errors> different bytes of every codeword to different values
+        """
+        damaged = coded.copy()
+        for row in damaged:
+            positions = self.rng.choice(len(row), errors, replace=False)
+            row[positions] ^= self.rng.integers(1, 256, errors, dtype=np.uint8)
+        return damaged
+
+    def test_clean_codewords(self):
+        coded = self.code.encode(self.bodies)
+        self.assertEqual(coded.shape, (len(self.bodies), self.code.coded_length(self.BODY_LEN)))
+        decoded, corrected = self.code.decode(coded, self.BODY_LEN)
+        np.testing.assert_array_equal(decoded, self.bodies)
+        np.testing.assert_array_equal(corrected, 0)
+
+    def test_corrects_half_of_parity(self):
+        for errors in range(1, self.PARITY // 2 + 1):
+            with self.subTest(errors=errors):
+                decoded, corrected = self.code.decode(self.damage(self.code.encode(self.bodies), errors),
+                                                      self.BODY_LEN)
+                np.testing.assert_array_equal(decoded, self.bodies)
+                np.testing.assert_array_equal(corrected, errors)
+
+    def test_odd_parity_is_rejected(self):
+        with self.assertRaises(ValueError):
+            ReedSolomon(3)
+
+
+class ConvolutionalTest(unittest.TestCase):
+    BODY_LEN = 8
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.code = Convolutional()
+        self.bodies = self.rng.integers(0, 256, (50, self.BODY_LEN), dtype=np.uint8)
+
+    def test_clean_codewords(self):
+        coded = self.code.encode(self.bodies)
+        self.assertEqual(coded.shape, (len(self.bodies), self.code.coded_length(self.BODY_LEN)))
+        decoded, corrected = self.code.decode(coded, self.BODY_LEN)
+        np.testing.assert_array_equal(decoded, self.bodies)
+        np.testing.assert_array_equal(corrected, 0)
+
+    def test_corrects_three_bit_errors(self):
+        coded = self.code.encode(self.bodies)
+        bits = np.unpackbits(coded, axis=1)
+        coded_bits = 2 * (self.BODY_LEN * 8 + self.code.memory)
+        # errors are spread over the codeword, one in every third of it
+        third = coded_bits // 3
+        for row in bits:
+            row[np.arange(3) * third + self.rng.integers(0, third, 3)] ^= 1
+        decoded, corrected = self.code.decode(np.packbits(bits, axis=1), self.BODY_LEN)
+        np.testing.assert_array_equal(decoded, self.bodies)
+        np.testing.assert_array_equal(corrected, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import logging
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(f"{'/'.join(os.path.dirname(os.path.realpath(__file__)).split('/')[:-1])}")
+
+from modem.framing import data_to_packets, bits_to_data  # noqa
+
+
+class InterleavingTest(unittest.TestCase):
+    PACKET_LEN = 5
+
+    def setUp(self):
+        self.logger = logging.getLogger("framing tests")
+        self.logger.addHandler(logging.NullHandler())
+        self.logger.propagate = False
+        self.data = bytes(np.random.default_rng(0).integers(65, 91, self.PACKET_LEN * 30, dtype=np.uint8))
+
+    def comm_config(self, fec, depth):
+        return {"start_byte": 255, "stop_byte": 128, "packet_len[bytes]": self.PACKET_LEN, "crc8_sum": True,
+                "fec": fec, "fec_parity[bytes]": 4, "interleaving_depth[packets]": depth}
+
+    def receive(self, comm_config, lost):
+        """
+        this method frames test data, silences <lost> packets and decodes the rest
+        :return: decoded data of every received packet in order of transmission
+        """
+        packets = data_to_packets(self.data, comm_config)
+        packets[lost] = 0
+        bits = np.concatenate((np.zeros(16, dtype=np.uint8), np.unpackbits(packets.reshape(-1))))
+        data, crc_check = bits_to_data(bits, comm_config, self.logger)
+        self.assertFalse(crc_check)
+        received = [index for index in range(len(packets)) if index not in lost]
+        self.assertEqual(len(data), len(received) * self.PACKET_LEN)
+        return {index: data[n * self.PACKET_LEN:(n + 1) * self.PACKET_LEN] for n, index in enumerate(received)}
+
+    def sent(self, index):
+        return self.data[index * self.PACKET_LEN:(index + 1) * self.PACKET_LEN]
+
+    def test_lost_first_packet_and_last_packet_of_block(self):
+        depth = 4
+        lost = [0, 2 * depth - 1]
+        for fec in ("none", "convolutional", "reed_solomon"):
+            with self.subTest(fec=fec):
+                received = self.receive(self.comm_config(fec, depth), lost)
+                # blocks without lost packet are not touched by the loss
+                for index, data in received.items():
+                    if index // depth not in (0, 1):
+                        self.assertEqual(data, self.sent(index), f"packet {index}")
+
+    def test_lost_packets_are_corrected(self):
+        # one lost packet of 8 damages 1 or 2 of 10 bytes in every packet of its block
+        depth = 8
+        received = self.receive(self.comm_config("reed_solomon", depth), [0, 2 * depth - 1])
+        for index, data in received.items():
+            self.assertEqual(data, self.sent(index), f"packet {index}")
+
+
+
+class SynchronizationTest(unittest.TestCase):
+    PACKET_LEN = 8
+
+    def setUp(self):
+        self.logger = logging.getLogger("framing tests")
+        self.logger.addHandler(logging.NullHandler())
+        self.logger.propagate = False
+        self.comm_config = {"start_byte": 255, "stop_byte": 128, "packet_len[bytes]": self.PACKET_LEN,
+                            "crc8_sum": True, "fec": "none", "interleaving_depth[packets]": 1}
+        self.data = b"hello world, this is a test!"
+        self.bits = np.unpackbits(data_to_packets(self.data, self.comm_config).reshape(-1))
+
+    def test_leading_silence_passes(self):
+        bits = np.concatenate((np.zeros(100, dtype=np.uint8), self.bits))
+        self.assertEqual(bits_to_data(bits, self.comm_config, self.logger), (self.data, True))
+
+    def test_cut_first_packet_fails(self):
+        for cut in (1, 2, 3, 8, 20):
+            with self.subTest(cut=cut):
+                data, crc_check = bits_to_data(self.bits[cut:], self.comm_config, self.logger)
+                self.assertFalse(crc_check)
+                self.assertEqual(data, self.data[self.PACKET_LEN:])
+
+    def test_no_packet_fails(self):
+        noise = np.random.default_rng(0).integers(0, 2, 1000, dtype=np.uint8)
+        for bits in (np.zeros(0, dtype=np.uint8), np.zeros(1000, dtype=np.uint8), noise):
+            with self.subTest(bits=len(bits)):
+                self.assertEqual(bits_to_data(bits, self.comm_config, self.logger), (b"", False))
+
+
+if __name__ == '__main__':
+    unittest.main()
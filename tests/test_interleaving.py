@@ -0,0 +1,33 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(f"{'/'.join(os.path.dirname(os.path.realpath(__file__)).split('/')[:-1])}")
+
+from modem.interleaving import interleave, deinterleave  # noqa
+
+
+class InterleaveTest(unittest.TestCase):
+    def setUp(self):
+        self.bodies = np.random.default_rng(1).integers(0, 256, (10, 7), dtype=np.uint8)
+
+    def test_deinterleave_is_inverse(self):
+        # 10 bodies at depth 4 end with block of 2 bodies, depth 1 and 10 keep one kind of block only
+        for depth in (1, 3, 4, 10, 16):
+            with self.subTest(depth=depth):
+                interleaved = interleave(self.bodies, depth)
+                if depth > 1:
+                    self.assertFalse(np.array_equal(interleaved, self.bodies))
+                np.testing.assert_array_equal(deinterleave(interleaved, depth), self.bodies)
+
+    def test_short_last_block_stays_in_its_rows(self):
+        interleaved = interleave(self.bodies, 4)
+        # bits of the last 2 bodies are only mixed with each other
+        np.testing.assert_array_equal(interleave(self.bodies[8:], 4), interleaved[8:])
+        np.testing.assert_array_equal(deinterleave(interleaved[8:], 4), self.bodies[8:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import logging
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(f"{'/'.join(os.path.dirname(os.path.realpath(__file__)).split('/')[:-1])}")
+
+from modem.processing_hub import ModulatorHub, DemodulatorHub  # noqa
+from modem.utils import Binary, Audio  # noqa
+from modulators import ASK_Modulator  # noqa
+from demodulators import ASK_Demodulator  # noqa
+
+
+class HubProfileTest(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger("profiling tests")
+        self.logger.addHandler(logging.NullHandler())
+        self.logger.propagate = False
+        self.modulator_hub = ModulatorHub(self.logger, "Modulator")
+        self.demodulator_hub = DemodulatorHub(self.logger, "Demodulator")
+        for hub in (self.modulator_hub, self.demodulator_hub):
+            hub.comm_config["baud_rate[bps]"] = 300
+        self.input_binary = self.modulator_hub.encode_data(Binary(bytearray(b"profiled twice")))
+
+    def test_every_call_has_own_profile(self):
+        profiles = []
+        for _ in range(2):
+            modulated_data = self.modulator_hub.modulate(self.input_binary, ASK_Modulator.ASK)
+            samples = np.asarray(modulated_data.samples)
+            audio = Audio(samples, modulated_data.sample_rate, len(samples), len(samples) / modulated_data.sample_rate)
+            demodulated_data = self.demodulator_hub.demodulate(audio, ASK_Demodulator.ASK)
+            profiles.append((modulated_data.profile, demodulated_data.profile))
+
+        for modulation, demodulation in profiles:
+            self.assertIn("modulation", modulation)
+            self.assertNotIn("encoding", modulation)
+            self.assertIn("demodulation", demodulation)
+            for name, stage in {**modulation, **demodulation}.items():
+                with self.subTest(stage=name):
+                    self.assertEqual(stage["calls"], 1)
+
+    def test_hub_profile_is_total_of_calls(self):
+        for _ in range(2):
+            modulated_data = self.modulator_hub.modulate(self.input_binary, ASK_Modulator.ASK)
+        total = self.modulator_hub.profiler.report()
+        self.assertEqual(total["encoding"]["calls"], 1)
+        for name, stage in modulated_data.profile.items():
+            with self.subTest(stage=name):
+                self.assertEqual(total[name]["calls"], 2)
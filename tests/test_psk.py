@@ -0,0 +1,72 @@
+import unittest
+import logging
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(f"{'/'.join(os.path.dirname(os.path.realpath(__file__)).split('/')[:-1])}")
+
+from modem.utils import Binary, Audio, load_config  # noqa
+from modem.framing import data_to_packets  # noqa
+from modulators import PSK_Modulator  # noqa
+from demodulators import PSK_Demodulator  # noqa
+
+
+class PSKRoundTripTest(unittest.TestCase):
+    DATA = b"The quick brown fox jumps over the lazy dog"
+
+    def setUp(self):
+        self.logger = logging.getLogger("psk tests")
+        self.logger.addHandler(logging.NullHandler())
+        self.logger.propagate = False
+        self.configs = f"{'/'.join(os.path.dirname(os.path.realpath(__file__)).split('/')[:-1])}/configs"
+        self.comm_config = load_config(f"{self.configs}/communication_config.json")
+        self.comm_config["baud_rate[bps]"] = 100
+        self.rng = np.random.default_rng(0)
+
+    def modulate(self, mode):
+        """
+        this method frames test data and modulates it
+        :return: samples starting at first sample of transmission and sample rate
+        """
+        config = load_config(f"{self.configs}/{mode}_Modulator.json")
+        modulator = getattr(PSK_Modulator, mode)(self.logger, config, self.comm_config)
+        packets = data_to_packets(self.DATA, self.comm_config)
+        _, samples, sample_rate, _ = modulator.modulate(Binary(bytearray(packets.tobytes())))
+        samples = np.asarray(samples)
+        return samples[np.flatnonzero(np.abs(samples) > 0.05)[0]:], sample_rate
+
+    def demodulate(self, mode, samples, sample_rate):
+        config = load_config(f"{self.configs}/{mode}_Demodulator.json")
+        demodulator = getattr(PSK_Demodulator, mode)(self.logger, config, self.comm_config)
+        samples = samples + self.rng.normal(0, 0.05, len(samples))
+        return demodulator.demodulate(Audio(samples, sample_rate, len(samples), len(samples) / sample_rate))
+
+    def check_onsets(self, mode):
+        """
+        this method moves the onset of transmission by whole symbols in both directions,
+        leading noise and preamble cut short must not shift or drop data
+        """
+        samples, sample_rate = self.modulate(mode)
+        samples_per_symbol = sample_rate // self.comm_config["baud_rate[bps]"]
+        for shift in (-40, -3, 0, 3, 10):
+            with self.subTest(mode=mode, shift=shift):
+                if shift < 0:
+                    shifted = np.concatenate((self.rng.normal(0, 0.3, -shift * samples_per_symbol), samples))
+                else:
+                    shifted = samples[shift * samples_per_symbol:]
+                demodulated_data = self.demodulate(mode, shifted, sample_rate)
+                self.assertTrue(demodulated_data.crc_check_pass)
+                self.assertEqual(bytes(demodulated_data.demodulated_data), self.DATA)
+
+    def test_bpsk_onsets(self):
+        self.check_onsets("BPSK")
+
+    def test_qpsk_onsets(self):
+        self.check_onsets("QPSK")
+
+    def test_missing_sync_word_fails(self):
+        samples, sample_rate = self.modulate("BPSK")
+        demodulated_data = self.demodulate("BPSK", self.rng.normal(0, 0.3, len(samples)), sample_rate)
+        self.assertFalse(demodulated_data.crc_check_pass)